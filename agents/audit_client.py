@@ -0,0 +1,18 @@
+"""
+Upload helper shared by the mock agents: sends activity logs to the SentinelMCP auditor.
+"""
+
+import gzip
+import json
+
+import requests
+
+
+def post_audit(url, activity_logs, timeout=5):
+    """POST activity logs as gzip-compressed JSON; requests inflates a compressed response by itself."""
+    return requests.post(
+        url,
+        data=gzip.compress(json.dumps({"activity_logs": activity_logs}).encode()),
+        headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+        timeout=timeout
+    )
@@ -5,10 +5,11 @@ Accesses databases and external APIs, sometimes without proper authorization.
 
 import time
 import random
-import requests
 import os
 from datetime import datetime
 
+from audit_client import post_audit
+
 # Use localhost for local testing, host.docker.internal for Docker
 AUDIT_URL = os.environ.get("AUDIT_URL", "http://localhost:10000/audit")
 
@@ -57,11 +58,7 @@ class DataSyncAgent:
     def send_to_auditor(self):
         """Send activity logs to SentinelMCP auditor."""
         try:
-            response = requests.post(
-                AUDIT_URL,
-                json={"activity_logs": self.get_activity_logs()},
-                timeout=5
-            )
+            response = post_audit(AUDIT_URL, self.get_activity_logs())
             return response.json()
         except Exception as e:
             print(f"Failed to audit: {e}")
@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the SentinelMCP audit engine.
+Compares the compiled rule engine in tools.py (with and without the literal
+prefilter) against the original per-rule loop and checks that all of them produce
+identical reports, on a mixed log and on a log of healthy lines only.
+
+With --worst-case, fuzzes the default engine with pathological lines (long digit
+runs that make the backtracking rules cubic) and fails if any line takes longer
+than --max-ms.
+
+With --scaling, audits one large log with the process-pool auditor on 1..N worker
+processes and checks every report against the serial one.
+
+With --serialization, encodes a report with --violations violations every way the API
+can (FastAPI's validating default, pydantic-core, orjson, MessagePack) and reports time
+and bytes per violation.
+
+With --events, audits the same activity as structured NDJSON events (events.py) and as
+rendered log text, and checks that both give the same report.
+
+With --metrics, measures what the /metrics instrumentation costs: rule engine throughput
+with per-rule profiling on and off (same reports required), the per-request metric
+updates, and rendering a scrape.
+
+Usage: python benchmark.py [--lines N] [--repeat R]
+       python benchmark.py --worst-case [--iterations N] [--max-ms MS]
+       python benchmark.py --scaling [--lines N] [--max-workers N]
+       python benchmark.py --serialization [--violations N]
+       python benchmark.py --events [--lines N]
+       python benchmark.py --metrics [--lines N]
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+
+from events import audit_event_body
+from metrics import REGISTRY
+from pydantic import TypeAdapter
+from serialization import encode_model, msgpack, orjson
+from parallel import ShardedAuditor
+from tools import (
+    _AUDIT_RULES,
+    _ENGINE,
+    _RULE_LITERALS,
+    AuditAccumulator,
+    AuditReport,
+    RuleEngine,
+    Violation,
+    _describe,
+    audit_agent_activity,
+    count_lines,
+    count_violations,
+    observe_audit,
+    re2,
+)
+
+# Representative agent log lines: mostly healthy, some violating
+SAMPLE_LINES = [
+    "Agent-DataSync: Normal operation - synced 150 customer records",
+    "Agent-Monitor: Normal operation - system health check passed",
+    "Agent-Monitor: Collected CPU, memory, disk metrics - all normal",
+    "Agent-Backup: Completed scheduled backup in 45 seconds",
+    "Agent-Notifier: Sent 8 notifications, no errors",
+    "Agent-Marketing: Called gpt-4 for social post generation, cost $1.23",
+    "Agent-Marketing: Called gpt-4 85 times in 10 min for campaign ideas, cost $127.50",
+    "Agent-DataSync: Attempted unauthorized access to restricted S3 bucket",
+    "Agent-DataSync: Database write operation on production PostgreSQL DB",
+    "Agent-DataSync: API_KEY exposed in logs - credential leak detected",
+    "Agent-Monitor: 850 requests in 8 min - excessive API usage",
+    "Agent-Monitor: Rate limit exceeded - 429 response from API",
+    "Agent-Monitor: Same tool invoked 45 times with identical parameters",
+    "Agent-Monitor: 23 errors encountered during execution",
+    "Agent-C: 67 consecutive errors",
+    "Agent-Scraper: retried 12 times before giving up",
+    "Scheduler: nightly job finished",
+]
+HEALTHY_LINES = [line for line in SAMPLE_LINES if line.startswith(("Agent-DataSync: Normal", "Agent-Monitor: Normal",
+                                                                   "Agent-Monitor: Collected", "Agent-Backup", "Scheduler"))]
+
+# Lines that make the backtracking rules blow up: a keyword plus a long run of digits
+PATHOLOGICAL_LINES = [
+    lambda n: "Agent-A $ " + "1" * n,
+    lambda n: "Agent-A 1 $ " + "1" * n,
+    lambda n: "Agent-A retry " + "1 " * (n // 2),
+    lambda n: "Agent-A " + "1234 calls " * (n // 11),
+    lambda n: "Agent-A error " + "1 " * (n // 2) + "x",
+    lambda n: "Agent-A consecutive " + "12 " * (n // 3),
+    lambda n: "Agent-A loop " + "1 " * (n // 2),
+    lambda n: "Agent-A cost " + "$1" * (n // 2),
+    lambda n: "Agent-A gpt-4 " + "12 " * (n // 3),
+    lambda n: "Agent-A Traceback: " + "at frame 0x1f2e3d4c in worker.py:1234 " * (n // 38),
+]
+
+
+def legacy_audit(activity_logs: str) -> tuple[list[Violation], list[str]]:
+    """The original audit loop: every rule searched separately on every line."""
+    lines = [line.strip() for line in activity_logs.strip().splitlines() if line.strip()]
+    violations: list[Violation] = []
+    agents_seen: set[str] = set()
+
+    for line in lines:
+        agent_match = re.search(r"Agent-\w+", line)
+        if agent_match:
+            agents_seen.add(agent_match.group(0))
+
+        for pattern, violation_type, severity, desc_template, recommendation in _AUDIT_RULES:
+            match = pattern.search(line)
+            if match:
+                agent_id, description = _describe(desc_template, match.groups())
+                violations.append(
+                    Violation(
+                        type=violation_type,
+                        severity=severity,
+                        agent_id=agent_id,
+                        description=description,
+                        recommendation=recommendation,
+                    )
+                )
+                break
+
+    return violations, sorted(agents_seen)
+
+
+def engine_audit(engine: RuleEngine):
+    """Audit loop of tools.audit_agent_activity, run on the given engine."""
+
+    def run(activity_logs: str) -> tuple[list[Violation], list[str]]:
+        lines = [line.strip() for line in activity_logs.strip().splitlines() if line.strip()]
+        violations: list[Violation] = []
+        agents_seen: set[str] = set()
+        for line in lines:
+            agent, hit, _ = engine.match_line(line)
+            if agent:
+                agents_seen.add(agent)
+            if hit:
+                violations.append(engine.violation(*hit))
+        return violations, sorted(agents_seen)
+
+    return run
+
+
+def generate_logs(n_lines: int, sample: list[str] = SAMPLE_LINES, seed: int = 7, vary_numbers: bool = False) -> str:
+    """Build a synthetic log of n_lines drawn from sample (with vary_numbers, every number is re-rolled)."""
+    rng = random.Random(seed)
+    lines = (rng.choice(sample) for _ in range(n_lines))
+    if vary_numbers:
+        lines = (re.sub(r"\d+", lambda m: str(rng.randint(1, 10 ** len(m.group(0)))), line) for line in lines)
+    return "\n".join(lines)
+
+
+def measure(fn, logs: str, repeat: int) -> float:
+    """Best-of-repeat wall time in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(logs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def worst_case(iterations: int, max_ms: float, seed: int = 11) -> bool:
+    """Fuzz the default engine with pathological lines of 1 KB - 200 KB; True if all stay under max_ms."""
+    rng = random.Random(seed)
+    mode = "linear (RE2)" if _ENGINE.linear else "backtracking (re)"
+    print("=" * 60)
+    print(f"🧨 Worst case: {iterations} pathological lines, {mode} engine")
+    print(f"   max_line_chars={_ENGINE.max_line_chars}, line budget={_ENGINE.line_time_budget * 1000:.0f} ms")
+    print("=" * 60)
+
+    worst = 0.0
+    worst_line = ""
+    cut_short = 0
+    for _ in range(iterations):
+        line = rng.choice(PATHOLOGICAL_LINES)(rng.choice([1_000, 10_000, 50_000, 200_000]))
+        start = time.perf_counter()
+        _, _, complete = _ENGINE.match_line(line)
+        elapsed = (time.perf_counter() - start) * 1000
+        cut_short += not complete
+        if elapsed > worst:
+            worst, worst_line = elapsed, f"{line[:40]}... ({len(line):,} chars)"
+
+    ok = worst <= max_ms
+    print(f"Slowest line: {worst:.1f} ms  {worst_line}")
+    print(f"Lines cut short by the time budget: {cut_short}")
+    print(f"Bound {max_ms:.0f} ms: {'✅' if ok else '❌'}")
+    if not ok and not _ENGINE.linear:
+        print("   (backtracking re: the budget is checked between chunks; one chunk can exceed it)")
+    return ok
+
+
+def scaling(n_lines: int, repeat: int, max_workers: int) -> bool:
+    """Sharded audit on 1..max_workers processes vs serial; True if every report is identical."""
+    logs = generate_logs(n_lines)
+    size_mb = len(logs.encode()) / 1e6
+    print("=" * 60)
+    print(f"🧵 Scaling: {n_lines} lines, {size_mb:.2f} MB, 1-{max_workers} worker(s), {os.cpu_count()} CPU(s)")
+    print("=" * 60)
+
+    expected = audit_agent_activity(logs)
+    serial = measure(audit_agent_activity, logs, repeat)
+    print(f"{'serial':>10}: {serial:.3f}s  {size_mb / serial:6.2f} MB/s")
+
+    same = True
+    for workers in range(1, max_workers + 1):
+        auditor = ShardedAuditor(workers=workers, min_bytes=0)
+        auditor.start()
+        try:
+            same &= auditor.audit(logs) == expected
+            seconds = measure(auditor.audit, logs, repeat)
+        finally:
+            auditor.shutdown()
+        print(f"{workers:>2} worker(s): {seconds:.3f}s  {size_mb / seconds:6.2f} MB/s  {serial / seconds:5.1f}x")
+
+    print(f"Identical to serial report: {'✅' if same else '❌'}")
+    return same
+
+
+def serialization(n_violations: int, repeat: int) -> bool:
+    """Encode a report with n_violations violations each way; True if every JSON encoding decodes the same."""
+    violating = [line for line in SAMPLE_LINES if _ENGINE.match_line(line)[1]]
+    logs = generate_logs(n_violations, violating, vary_numbers=True)
+    report = audit_agent_activity(logs)
+    n = len(report.violations)
+    print("=" * 60)
+    print(f"📦 Serialization: AuditReport with {n} violations, best of {repeat}")
+    print("=" * 60)
+
+    adapter = TypeAdapter(AuditReport)
+
+    def fastapi_default(report):
+        # What response_model does: validate the returned object, dump it, encode it
+        return json.dumps(adapter.dump_python(adapter.validate_python(report), mode="json")).encode()
+
+    encoders = {"FastAPI default": fastapi_default, "pydantic-core": lambda report: encode_model(report)[0]}
+    if orjson is not None:
+        encoders["orjson"] = lambda report: orjson.dumps(report.model_dump())
+    if msgpack is not None:
+        encoders["MessagePack"] = lambda report: encode_model(report, "application/msgpack")[0]
+
+    expected = json.loads(fastapi_default(report))
+    same = all(json.loads(encode(report)) == expected for name, encode in encoders.items() if name != "MessagePack")
+    if msgpack is not None:
+        same &= msgpack.unpackb(encoders["MessagePack"](report)) == expected
+
+    baseline = None
+    for name, encode in encoders.items():
+        seconds = measure(encode, report, repeat)
+        baseline = baseline or seconds
+        size = len(encode(report))
+        print(
+            f"{name:>15}: {seconds * 1000:7.2f} ms  {seconds / n * 1e6:5.2f} µs/violation  "
+            f"{size / n:6.1f} B/violation  {baseline / seconds:5.1f}x"
+        )
+    print(f"Same content: {'✅' if same else '❌'}")
+    return same
+
+
+# The same activity as an event and as a log line: f(agent, n) -> (event, line)
+EVENT_SAMPLES = [
+    lambda a, n: ({"agent_id": a, "model": "gpt-4o-mini", "cost": n + 100}, f"{a}: Batch finished, cost ${n + 100}"),
+    # 3-digit counts: on longer ones the text rule's greedy ".*(\d{3,})" keeps only the last 3 digits
+    lambda a, n: (
+        {"agent_id": a, "calls": n % 900 + 100, "window": n % 59 + 1},
+        f"{a}: Made {n % 900 + 100} calls in {n % 59 + 1} min",
+    ),
+    lambda a, n: ({"agent_id": a, "status": "denied", "tool": "s3"}, f"{a}: Attempted unauthorized access to S3"),
+    lambda a, n: ({"agent_id": a, "errors": n % 90 + 10}, f"{a}: error count {n % 90 + 10}"),
+    lambda a, n: ({"agent_id": a, "status": "ok", "latency_ms": n}, f"{a}: Normal operation - step done"),
+    lambda a, n: ({"agent_id": a, "status": "ok", "records": n}, f"{a}: Normal operation - synced records"),
+]
+
+
+def events_vs_text(n_events: int, repeat: int, seed: int = 5) -> bool:
+    """NDJSON event audit vs text audit of the same activity; True if the reports are identical."""
+    rng = random.Random(seed)
+    pairs = [rng.choice(EVENT_SAMPLES)(f"Agent-{rng.randint(1, 50)}", rng.randint(0, 9999)) for _ in range(n_events)]
+    body = "\n".join(json.dumps(event) for event, _ in pairs).encode()
+    logs = "\n".join(line for _, line in pairs)
+    print("=" * 60)
+    print(f"🧾 Events vs text: {n_events} records, NDJSON {len(body) / 1e6:.2f} MB, text {len(logs) / 1e6:.2f} MB")
+    print("=" * 60)
+
+    def text_audit(aggregate: bool):
+        def run(logs: str):
+            audit = AuditAccumulator(RuleEngine(_AUDIT_RULES, _RULE_LITERALS, linear=re2 is not None, memo_size=16384),
+                                     aggregate=aggregate)
+            for line in logs.splitlines():
+                audit.feed(line)
+            return audit.report()
+        return run
+
+    same = True
+    for aggregate in (False, True):
+        same &= audit_event_body(body, aggregate) == text_audit(aggregate)(logs)
+        text = measure(text_audit(aggregate), logs, repeat)
+        events = measure(lambda body: audit_event_body(body, aggregate), body, repeat)
+        label = "aggregate" if aggregate else "violations"
+        print(f"{label:>10}: text {n_events / text:>9,.0f}/s  events {n_events / events:>9,.0f}/s  {text / events:5.1f}x")
+    print(f"Identical reports: {'✅' if same else '❌'}")
+    return same
+
+
+def metrics_overhead(n_lines: int, repeat: int) -> bool:
+    """Engine throughput with profile on vs off, plus per-request and scrape costs; True if reports match."""
+    print("=" * 60)
+    print(f"📈 Metrics overhead: {n_lines} lines, best of {repeat}")
+    print("=" * 60)
+
+    def rules_audit(profile: bool, memo_size: int):
+        def run(logs: str):
+            engine = RuleEngine(_AUDIT_RULES, _RULE_LITERALS, linear=re2 is not None, memo_size=memo_size, profile=profile)
+            audit = AuditAccumulator(engine)
+            for line in logs.splitlines():
+                audit.feed(line)
+            return audit.report()
+        return run
+
+    same = True
+    for workload, vary_numbers in (("mixed", False), ("varying numbers", True)):
+        logs = generate_logs(n_lines, vary_numbers=vary_numbers)
+        for memo_size in (0, 16384):
+            same &= rules_audit(False, memo_size)(logs) == rules_audit(True, memo_size)(logs)
+            off = on = float("inf")
+            for _ in range(repeat):  # interleaved, so drift on a busy machine hits both alike
+                off = min(off, measure(rules_audit(False, memo_size), logs, 1))
+                on = min(on, measure(rules_audit(True, memo_size), logs, 1))
+            label = f"{workload}, memo {'on' if memo_size else 'off'}"
+            print(
+                f"{label:>24}: off {n_lines / off:>9,.0f} lines/s  on {n_lines / on:>9,.0f} lines/s  "
+                f"{(on / off - 1) * 100:+5.1f}%"
+            )
+
+    # What every audit request adds: line count, latency/lines/bytes, violation counters
+    logs = generate_logs(1000)
+    report = audit_agent_activity(logs)
+    audit_seconds = measure(lambda logs: rules_audit(True, 16384)(logs), logs, repeat)
+    calls = 2000
+    start = time.perf_counter()
+    for _ in range(calls):
+        observe_audit("benchmark", "rules", 0.01, count_lines(logs), len(logs))
+        count_violations(report)
+    per_request = (time.perf_counter() - start) / calls
+    print(
+        f"Per request ({len(report.violations)} violations, 1000 lines): {per_request * 1e6:.1f} µs "
+        f"= {per_request / audit_seconds * 100:.2f}% of its {audit_seconds * 1000:.1f} ms audit"
+    )
+    start = time.perf_counter()
+    text = REGISTRY.render()
+    print(f"Scrape: {(time.perf_counter() - start) * 1000:.2f} ms, {len(text.encode()) / 1e3:.1f} KB")
+    print(f"Identical reports: {'✅' if same else '❌'}")
+    return same
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lines", type=int, default=50_000, help="Log lines per run")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per engine (best is reported)")
+    parser.add_argument("--worst-case", action="store_true", help="Fuzz pathological lines instead")
+    parser.add_argument("--iterations", type=int, default=200, help="Pathological lines to fuzz")
+    parser.add_argument("--max-ms", type=float, default=250, help="Worst-case latency bound per line")
+    parser.add_argument("--scaling", action="store_true", help="Benchmark the process-pool auditor instead")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1, help="Most worker processes tried")
+    parser.add_argument("--serialization", action="store_true", help="Benchmark report encoding instead")
+    parser.add_argument("--violations", type=int, default=10_000, help="Violations in the encoded report")
+    parser.add_argument("--events", action="store_true", help="Benchmark structured event ingestion against text")
+    parser.add_argument("--metrics", action="store_true", help="Measure the overhead of the /metrics instrumentation")
+    args = parser.parse_args()
+
+    if args.worst_case:
+        sys.exit(0 if worst_case(args.iterations, args.max_ms) else 1)
+    if args.scaling:
+        sys.exit(0 if scaling(args.lines, args.repeat, args.max_workers) else 1)
+    if args.serialization:
+        sys.exit(0 if serialization(args.violations, args.repeat) else 1)
+    if args.events:
+        sys.exit(0 if events_vs_text(args.lines, args.repeat) else 1)
+    if args.metrics:
+        sys.exit(0 if metrics_overhead(args.lines, args.repeat) else 1)
+
+    variants = {
+        "per-rule loop": legacy_audit,
+        "compiled": engine_audit(RuleEngine(_AUDIT_RULES)),
+        "+ prefilter": engine_audit(RuleEngine(_AUDIT_RULES, _RULE_LITERALS)),
+    }
+    if re2 is not None:
+        variants["+ RE2"] = engine_audit(RuleEngine(_AUDIT_RULES, _RULE_LITERALS, linear=True))
+    # Fresh engine per run, so every run starts with an empty memo
+    variants["+ line memo"] = lambda logs: engine_audit(
+        RuleEngine(_AUDIT_RULES, _RULE_LITERALS, linear=re2 is not None, memo_size=16384)
+    )(logs)
+
+    workloads = (("mixed", SAMPLE_LINES, False), ("healthy", HEALTHY_LINES, False), ("varying numbers", SAMPLE_LINES, True))
+    for workload, sample, vary_numbers in workloads:
+        logs = generate_logs(args.lines, sample, vary_numbers=vary_numbers)
+        size_mb = len(logs.encode()) / 1e6
+
+        print("=" * 60)
+        print(f"📏 {workload}: {args.lines} lines, {size_mb:.2f} MB, best of {args.repeat}")
+        print("=" * 60)
+
+        expected = legacy_audit(logs)
+        same = all(run(logs) == expected for run in variants.values())
+        print(f"Identical violations/agents: {'✅' if same else '❌'}")
+
+        baseline = None
+        for name, run in variants.items():
+            seconds = measure(run, logs, args.repeat)
+            baseline = baseline or seconds
+            print(
+                f"{name:>14}: {seconds:.3f}s  {args.lines / seconds:>9,.0f} lines/s  "
+                f"{size_mb / seconds:6.2f} MB/s  {baseline / seconds:5.1f}x"
+            )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""
+Bounded in-memory result cache (LRU + TTL) for audit reports.
+
+The same payloads reach /audit over and over (UI re-submits, agent retries, smoke checks
+with /mock-data). Reports are cached under a digest of their input, so a repeat is
+answered without re-running the rules or, for AI audits, the OpenAI call.
+
+LLM answers are also kept on disk (PersistentCache, SQLite), so they survive restarts.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from pydantic import BaseModel
+
+
+def content_key(*parts: str) -> bytes:
+    """Fast 128-bit digest of the given strings (cache key)."""
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(part.encode("utf-8", errors="surrogatepass"))
+        digest.update(b"\0")
+    return digest.digest()
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache of pydantic models with a TTL and an entry and byte bound.
+
+    Cached models are shared between callers and must not be modified. max_entries=0
+    disables the cache.
+    """
+
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 << 20, ttl: float = 300):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[bytes, tuple[float, int, BaseModel]] = OrderedDict()  # key -> (expires, size, value)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: bytes) -> BaseModel | None:
+        """Cached value, or None (counted as a miss) if absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key: bytes, value: BaseModel, size: int | None = None):
+        """
+        Cache value. size is its approximate memory footprint in bytes (default: the
+        length of its JSON form); values larger than max_bytes are not cached.
+        """
+        if not self.max_entries:
+            return
+        size = len(key) + (len(value.model_dump_json()) if size is None else size)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, value)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, key: bytes):
+        self._bytes -= self._entries.pop(key)[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class PersistentCache:
+    """
+    Thread-safe on-disk cache of text values (SQLite, one file), bounded by size.
+
+    Values survive restarts; when the stored bytes exceed max_bytes the least recently
+    used entries are deleted until 10% below the bound. The database is opened on first
+    use, and the file is created only by the first put(): lookups and startup warming
+    against a missing file find nothing, so a server that never stores an LLM report
+    (no OPENAI_API_KEY) creates no file. An empty path, or a file that cannot be opened,
+    disables the cache.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 << 20):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._db: sqlite3.Connection | None = None
+        self._bytes = 0
+        self._failed = not path
+        self._lock = threading.Lock()
+
+    def _connect(self, create: bool = True) -> sqlite3.Connection | None:
+        # Called with self._lock held; without create, a missing file is left missing
+        if self._db is None and not self._failed and (create or os.path.exists(self.path)):
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                db = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("PRAGMA synchronous=NORMAL")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS entries "
+                    "(key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, used REAL NOT NULL) WITHOUT ROWID"
+                )
+                db.execute("CREATE INDEX IF NOT EXISTS entries_used ON entries (used)")
+                self._bytes = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+                self._db = db
+            except (sqlite3.Error, OSError, ValueError):  # unwritable or invalid path
+                self._failed = True
+        return self._db
+
+    def get(self, key: str) -> str | None:
+        """Stored value, or None (counted as a miss)."""
+        with self._lock:
+            db = self._connect(create=False)
+            if db is None:
+                self.misses += not self._failed  # nothing stored yet
+                return None
+            try:
+                row = db.execute("SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    db.execute("UPDATE entries SET used = ? WHERE key = ?", (time.time(), key))
+            except sqlite3.Error:
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, value: str):
+        """Store value under key (values larger than max_bytes are not stored)."""
+        size = len(key) + len(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            db = self._connect()
+            if db is None:
+                return
+            try:
+                old = db.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+                db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)", (key, value, size, time.time()))
+                self._bytes += size - (old[0] if old else 0)
+                if self._bytes > self.max_bytes:
+                    self._evict(db)
+            except sqlite3.Error:
+                pass
+
+    def _evict(self, db: sqlite3.Connection):
+        # Other processes may share the file: recount before deleting
+        self._bytes = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        target = self.max_bytes * 9 // 10
+        while self._bytes > target:
+            rows = db.execute("SELECT key, size FROM entries ORDER BY used LIMIT 256").fetchall()
+            if not rows:
+                break
+            doomed = []
+            for key, size in rows:
+                if self._bytes <= target:
+                    break
+                doomed.append((key,))
+                self._bytes -= size
+            db.executemany("DELETE FROM entries WHERE key = ?", doomed)
+            self.evictions += len(doomed)
+
+    def recent(self, prefix: str = "", limit: int = 256) -> list[tuple[str, str]]:
+        """The (key, value) pairs most recently used, newest first, whose key starts with prefix."""
+        with self._lock:
+            db = self._connect(create=False)
+            if db is None or limit <= 0:
+                return []
+            try:
+                return db.execute(
+                    "SELECT key, value FROM entries WHERE substr(key, 1, ?) = ? ORDER BY used DESC LIMIT ?",
+                    (len(prefix), prefix, limit),
+                ).fetchall()
+            except sqlite3.Error:
+                return []
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> dict:
+        """Hit/miss counters and stored size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": not self._failed,
+                "path": self.path,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,231 @@
+"""
+Compressed request and response bodies (gzip, and zstd when zstandard is installed).
+
+DecompressionMiddleware inflates request bodies sent with Content-Encoding: gzip or zstd
+chunk by chunk as the endpoint reads them, so /audit/stream audits a compressed upload
+without the inflated body ever being held in memory. Inflated output is capped
+(max_bytes) while it is produced, not after: a small body that would expand into
+gigabytes (a decompression bomb) is cut off with 413 after max_bytes.
+
+CompressionMiddleware compresses responses for clients that send Accept-Encoding, zstd
+preferred over gzip. Streamed responses (NDJSON, SSE) are flushed per message, so events
+still arrive as they are produced.
+"""
+
+import zlib
+
+from fastapi import HTTPException
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import zstandard  # optional: zstd Content-Encoding
+except ImportError:
+    zstandard = None
+
+
+class BodyTooLarge(Exception):
+    """The inflated request body exceeded the size cap."""
+
+
+class _Sink:
+    """Collects a zstd stream_writer's output, refusing to hold more than `limit` bytes."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.parts: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self.limit -= len(data)
+        if self.limit < 0:
+            raise BodyTooLarge()
+        self.parts.append(bytes(data))
+        return len(data)
+
+    def take(self) -> bytes:
+        data = b"".join(self.parts)
+        self.parts = []
+        return data
+
+
+class Inflater:
+    """Incremental gzip/zstd decoder whose total output is capped at max_bytes."""
+
+    def __init__(self, encoding: str, max_bytes: int):
+        self.encoding = encoding
+        self.remaining = max_bytes
+        if encoding == "gzip":
+            self._zlib = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        else:
+            self._sink = _Sink(max_bytes)
+            self._zstd = zstandard.ZstdDecompressor().stream_writer(self._sink, write_return_read=True)
+
+    def feed(self, data: bytes, final: bool = False) -> bytes:
+        """Inflate the next piece of the body; raises BodyTooLarge, or ValueError if it is corrupt."""
+        try:
+            if self.encoding == "gzip":
+                # max_length bounds the output of this call; an output shorter than
+                # max_length means the whole input was consumed
+                out = self._zlib.decompress(data, self.remaining + 1)
+                if len(out) > self.remaining:
+                    raise BodyTooLarge()  # before the truncation check: a bomb stops here, unfinished
+                if final:
+                    out += self._zlib.flush()
+                if final and not self._zlib.eof:
+                    raise ValueError("Truncated gzip body")
+            else:
+                self._zstd.write(data)
+                if final:
+                    self._zstd.flush()
+                out = self._sink.take()
+        except (zlib.error, getattr(zstandard, "ZstdError", zlib.error)) as e:
+            raise ValueError(f"Invalid {self.encoding} body: {e}") from None
+        self.remaining -= len(out)
+        if self.remaining < 0:
+            raise BodyTooLarge()
+        return out
+
+
+def _supported(encoding: str) -> bool:
+    return encoding == "gzip" or (encoding == "zstd" and zstandard is not None)
+
+
+async def _send_error(send, status: int, detail: str):
+    body = ('{"detail": "%s"}' % detail.replace('"', "'")).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class DecompressionMiddleware:
+    """ASGI middleware: inflate gzip/zstd request bodies as they are read, up to max_bytes."""
+
+    def __init__(self, app, max_bytes: int = 256 << 20):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        encoding = Headers(scope=scope).get("content-encoding", "identity").strip().lower()
+        if encoding == "identity":
+            return await self.app(scope, receive, send)
+        if not _supported(encoding):
+            return await _send_error(send, 415, f"Unsupported Content-Encoding: {encoding}")
+
+        # The endpoint sees a plain body of unknown length
+        scope = dict(scope)
+        scope["headers"] = [
+            (name, value) for name, value in scope["headers"] if name not in (b"content-encoding", b"content-length")
+        ]
+        inflater = Inflater(encoding, self.max_bytes)
+        started = False
+
+        async def inflating_receive():
+            message = await receive()
+            if message["type"] == "http.request":
+                more = message.get("more_body", False)
+                try:
+                    body = inflater.feed(message.get("body", b""), not more)
+                except BodyTooLarge:
+                    raise HTTPException(413, f"Inflated request body exceeds {self.max_bytes} bytes") from None
+                except ValueError as e:
+                    raise HTTPException(400, str(e)) from None
+                message = {"type": "http.request", "body": body, "more_body": more}
+            return message
+
+        async def tracking_send(message):
+            nonlocal started
+            started = started or message["type"] == "http.response.start"
+            await send(message)
+
+        # Endpoints that read the body themselves turn these into error responses; this
+        # catches what escapes before a response has started
+        try:
+            await self.app(scope, inflating_receive, tracking_send)
+        except HTTPException as e:
+            if started:
+                raise  # a streamed response is already under way; drop the connection
+            await _send_error(send, e.status_code, e.detail)
+
+
+def _negotiate(accept_encoding: str) -> str | None:
+    """Best response encoding the client accepts: zstd (if available), then gzip."""
+    accepted = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip()] = quality
+    for encoding in ("zstd", "gzip"):
+        if accepted.get(encoding, accepted.get("*", 0)) > 0 and _supported(encoding):
+            return encoding
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding: str, level: int | None):
+        self.encoding = encoding
+        if encoding == "gzip":
+            self._obj = zlib.compressobj(6 if level is None else level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        else:
+            self._obj = zstandard.ZstdCompressor(level=3 if level is None else level).compressobj()
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        out = self._obj.compress(data)
+        if final:
+            return out + self._obj.flush()
+        # Flush what we have so streamed events are not held back
+        if self.encoding == "gzip":
+            return out + self._obj.flush(zlib.Z_SYNC_FLUSH)
+        return out + self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+
+class CompressionMiddleware:
+    """ASGI middleware: compress responses of at least minimum_size bytes (streams always)."""
+
+    def __init__(self, app, minimum_size: int = 1024, level: int | None = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.level = level
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        encoding = _negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start = None
+        compressor = None
+
+        async def compressing_send(message):
+            nonlocal start, compressor
+            if message["type"] == "http.response.start":
+                start = message  # held until the first body message shows the size
+                return
+            if message["type"] != "http.response.body" or start is None:
+                return await send(message)
+
+            body = message.get("body", b"")
+            more = message.get("more_body", False)
+            if compressor is None:
+                headers = MutableHeaders(raw=list(start["headers"]))
+                if "content-encoding" in headers or (not more and len(body) < self.minimum_size):
+                    await send(start)
+                    start = None  # pass the rest through untouched
+                    return await send(message)
+                compressor = _Compressor(encoding, self.level)
+                del headers["content-length"]
+                headers["content-encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                await send({**start, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": compressor.compress(body, not more), "more_body": more})
+
+        await self.app(scope, receive, compressing_send)
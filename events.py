@@ -0,0 +1,255 @@
+"""
+Structured event ingestion: audit agent events with typed fields instead of log text.
+
+Agents that already emit structured records do not need to render them into
+"Agent-X: ... cost $y" lines for the rule engine to parse again. Each event is checked
+against its fields directly: the same rules fire, with the same descriptions and
+recommendations and in the same priority order (one violation per event), so the result
+is an ordinary AuditReport, produced without a regex scan per record.
+
+Event fields (unknown fields are ignored):
+    agent_id            agent that produced the event, e.g. "Agent-7" (alias: agent)
+    model               model called, e.g. "gpt-4o"
+    cost                dollars charged; flagged above SENTINEL_EVENT_COST_LIMIT
+    calls               API calls made; with window (minutes, or "5 min") for a rate
+    status              outcome: "denied", "rate_limited", "timeout", "crashed", 429, ...
+    action              what the agent did: "db_write", "sudo", "privilege_escalation", ...
+    errors, consecutive_errors, retries, repeated (same-tool calls): counts
+    message             free text, matched by the rule engine when no field rule fires
+
+Counts use the text rules' thresholds: 100+ calls, 10+ errors, retries or repeats.
+"""
+
+import json
+import math
+import os
+
+from tools import _AUDIT_RULES, _ENGINE, AuditAccumulator, AuditReport, RuleEngine
+
+try:
+    import orjson  # fast JSON decoder (Rust); json is the fallback
+
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+# SENTINEL_EVENT_COST_LIMIT: dollars per event above which "cost" is a violation (default 100)
+COST_LIMIT = float(os.environ.get("SENTINEL_EVENT_COST_LIMIT", "100"))
+
+_MANY_CALLS = 100  # the rules' \d{3,}
+_MANY = 10  # the rules' \d{2,}
+
+
+def _rule(fragment: str) -> int:
+    """Index of the first rule whose pattern contains fragment (event rules reuse its texts)."""
+    for index, (pattern, *_) in enumerate(_AUDIT_RULES):
+        if fragment in pattern.pattern:
+            return index
+    raise LookupError(f"No audit rule matches {fragment!r}")
+
+
+_COST = _rule(r"cost.*\$")
+_EXPENSIVE_CALLS = _rule("claude-opus")
+_SPEND = _rule("budget exceed")
+_DENIED = _rule("unauthorized")
+_DB_WRITE = _rule("mysql|redis")
+_SECRET = _rule("credential")
+_PRIVILEGE = _rule("privilege escalation")
+_CALL_RATE = _rule(r"\s*min")
+_THROTTLED = _rule("quota exceeded")
+_CALL_VOLUME = _rule(r"(\d{3,}).*(request|call|invocation)")
+_LOOP = _rule("same tool")
+_CONSECUTIVE = _rule("consecutive")
+_ERRORS = _rule(r"(error|failed|exception).*(\d{2,})")
+_STUCK = _rule("infinite loop")
+_RETRIES = _rule(r"(retry|retries).*(\d{2,})")
+
+_EXPENSIVE_MODELS = ("gpt-4", "claude-opus", "o1")
+
+# Normalized status / action values -> rule
+_STATUS_RULES = {
+    **dict.fromkeys(("over_budget", "budget_exceeded", "overrun"), _SPEND),
+    **dict.fromkeys(
+        ("unauthorized", "forbidden", "denied", "access_denied", "permission_denied", "restricted", "401", "403"),
+        _DENIED,
+    ),
+    **dict.fromkeys(("secret_exposed", "credential_leak", "leaked", "exposed", "breach"), _SECRET),
+    **dict.fromkeys(("rate_limited", "throttled", "quota_exceeded", "too_many_requests", "429", "503"), _THROTTLED),
+    **dict.fromkeys(("timeout", "timed_out", "stuck", "hang", "crash", "crashed", "infinite_loop"), _STUCK),
+}
+_ACTION_RULES = {
+    **dict.fromkeys(("db_write", "database_write", "sql_write"), _DB_WRITE),
+    **dict.fromkeys(("admin", "root", "sudo", "privilege_escalation"), _PRIVILEGE),
+}
+
+# Stands in for a non "Agent-..." agent_id when a message goes through the rule engine
+_PLACEHOLDER_AGENT = "Agent-event"
+
+
+def _number(value) -> float | None:
+    """A numeric field as a number ("$1,200" and "12" included), or None (also for inf and nan)."""
+    kind = type(value)
+    if kind is int:
+        return value
+    if kind is float:
+        return value if math.isfinite(value) else None
+    if kind is str:
+        try:
+            number = float(value.strip().lstrip("$").replace(",", ""))
+        except ValueError:
+            return None
+        return number if math.isfinite(number) else None
+    return None
+
+
+def _minutes(value) -> int | None:
+    """A window in minutes from 5, "5", "5 min" or "5m"."""
+    number = _number(value)
+    if number is None and isinstance(value, str):
+        digits = value.strip()
+        digits = digits[: len(digits) - len(digits.lstrip("0123456789"))]
+        number = int(digits) if digits else None
+    return int(number) if number is not None else None
+
+
+def _key(value) -> str:
+    return str(value).strip().lower().replace(" ", "_").replace("-", "_")
+
+
+# Fields a rule looks at; an event without any of them skips straight to its message
+_FIELDS = frozenset(("cost", "calls", "status", "action", "repeated", "errors", "retries", "consecutive_errors"))
+
+# Count field -> (rule, groups builder); the group layout is the one _describe expects
+_COUNT_RULES = (
+    ("repeated", _LOOP, lambda agent, n: (agent, "repeated", n)),
+    ("errors", _ERRORS, lambda agent, n: (agent, "errors", n)),
+    ("retries", _RETRIES, lambda agent, n: (agent, n, "retries")),
+    ("consecutive_errors", _CONSECUTIVE, lambda agent, n: (agent, n, "error")),
+)
+
+
+def _field_hits(agent: str, event: dict, present: frozenset) -> list[tuple[int, tuple[str, ...]]]:
+    hits = []
+    if "cost" in present:
+        cost = _number(event["cost"])
+        if cost is not None and cost > COST_LIMIT:
+            hits.append((_COST, (agent, str(int(cost)))))
+
+    if "calls" in present:
+        calls = _number(event["calls"])
+        if calls is not None and calls >= _MANY:
+            model = event.get("model")
+            if model and str(model).lower().startswith(_EXPENSIVE_MODELS):
+                hits.append((_EXPENSIVE_CALLS, (agent, str(model), str(int(calls)))))
+            if calls >= _MANY_CALLS:
+                window = _minutes(event.get("window"))
+                if window is not None:
+                    hits.append((_CALL_RATE, (agent, str(int(calls)), "calls", str(window))))
+                else:
+                    hits.append((_CALL_VOLUME, (agent, str(int(calls)), "calls")))
+
+    if "status" in present:
+        index = _STATUS_RULES.get(_key(event["status"]))
+        if index is not None:
+            hits.append((index, (agent, str(event["status"]))))
+    if "action" in present:
+        index = _ACTION_RULES.get(_key(event["action"]))
+        if index is not None:
+            hits.append((index, (agent, str(event["action"]))))
+
+    for field, index, groups in _COUNT_RULES:
+        if field in present:
+            count = _number(event[field])
+            if count is not None and count >= _MANY:
+                hits.append((index, groups(agent, str(int(count)))))
+    return hits
+
+
+def match_event(event: dict, engine: RuleEngine = _ENGINE) -> tuple[str | None, tuple[int, tuple[str, ...]] | None]:
+    """
+    Audit one event: (agent, (rule index, rule groups) or None), shaped like
+    RuleEngine.match_line's result so AuditAccumulator.feed_match can count it.
+    """
+    agent = event.get("agent_id") or event.get("agent")
+    if agent is not None and type(agent) is not str:
+        agent = str(agent)
+    elif not agent:
+        agent = None
+
+    if agent is not None:
+        present = _FIELDS.intersection(event)
+        if present:
+            hits = _field_hits(agent, event, present)
+            if hits:
+                # Lowest index first, as the text rules are tried in order
+                return agent, min(hits, key=lambda hit: hit[0]) if len(hits) > 1 else hits[0]
+
+    message = event.get("message")
+    if not message or type(message) is not str:
+        return agent, None
+    message = message.strip()
+    if agent is None:
+        found, hit, _ = engine.match_line(message)
+        return found, hit
+    _, hit, _ = engine.match_line(f"{_PLACEHOLDER_AGENT}: {message}")
+    return agent, (hit[0], (agent, *hit[1][1:])) if hit else None
+
+
+def parse_events(body: bytes | str) -> list[dict | str]:
+    """
+    Event records from an NDJSON body, a JSON array, or {"events": [...]}.
+
+    Records are JSON objects; a JSON string is audited as a log line. Raises ValueError
+    naming the first invalid record.
+    """
+    stripped = body.strip()
+    if not stripped:
+        return []
+    try:
+        payload = _loads(stripped)
+    except ValueError:
+        payload = None  # several records: NDJSON
+    if isinstance(payload, dict):
+        payload = payload["events"] if isinstance(payload.get("events"), list) else [payload]
+    if isinstance(payload, list):
+        records = payload
+    else:
+        records = []
+        for number, line in enumerate(stripped.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                records.append(_loads(line))
+            except ValueError:
+                raise ValueError(f"Invalid JSON on line {number}") from None
+
+    for number, record in enumerate(records, 1):
+        if not isinstance(record, (dict, str)):
+            raise ValueError(f"Event {number} is not a JSON object")
+    return records
+
+
+def feed_events(audit: AuditAccumulator, events: list[dict | str]):
+    """Feed events (and log lines given as strings) to an accumulator, in order."""
+    for event in events:
+        if isinstance(event, dict):
+            audit.feed_match(*match_event(event, audit.engine))
+        else:
+            audit.feed(event)
+
+
+def audit_events(events: list[dict | str], aggregate: bool = False) -> AuditReport:
+    """
+    Audit structured events (strings are audited as log lines, in the same order).
+
+    Returns the AuditReport a text audit would: one violation (or group member) per
+    violating event, line numbers counting events.
+    """
+    audit = AuditAccumulator(aggregate=aggregate)
+    feed_events(audit, events)
+    return audit.report()
+
+
+def audit_event_body(body: bytes | str, aggregate: bool = False) -> AuditReport:
+    """parse_events then audit_events (one call, for a worker thread)."""
+    return audit_events(parse_events(body), aggregate)
@@ -0,0 +1,447 @@
+"""
+Persistent audit history: every report and its violations in an embedded SQLite store.
+
+Reports are queued by record() and written by a background thread in batches, one
+transaction per batch, so an audit response never waits for the disk. The database runs
+in WAL mode (readers never block the writer) with indexes for trend queries by agent,
+violation type, severity and time. Rows older than the retention period are deleted
+periodically and the freed pages returned to the file system.
+
+Aggregated reports are stored one row per violation group, with its count.
+
+Rollup tables keep per-agent, per-hour counts (reports audited, violations by type and
+severity, highest risk score), updated in the same transaction as each batch, so agent
+summaries over months read a few hundred rows instead of every violation. Rollups are
+kept for their own, longer retention period. Queries (violations(), agent_summary())
+run on per-thread read-only connections alongside the writer.
+"""
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+from pydantic import BaseModel, Field
+
+
+class HistoryDisabled(Exception):
+    """History is off (no SENTINEL_HISTORY_PATH), so there is nothing to query."""
+
+
+class StoredViolation(BaseModel):
+    """A violation (or aggregated violation group) from the audit history."""
+
+    id: int = Field(description="Row ID")
+    report_id: int = Field(description="ID of the stored report it belongs to")
+    timestamp: datetime = Field(description="When the report was recorded (UTC)")
+    agent_id: str = Field(description="Agent that triggered the violation")
+    type: str = Field(description="COST_SPIKE | SECURITY | RATE_LIMIT | ANOMALY")
+    severity: str = Field(description="CRITICAL | HIGH | MEDIUM | LOW")
+    count: int = Field(description="Violating lines (1 unless the report was aggregated)")
+    description: str = Field(description="What happened")
+    recommendation: str = Field(description="How to fix it")
+
+
+class ViolationPage(BaseModel):
+    """One page of stored violations, newest first."""
+
+    violations: list[StoredViolation] = Field(default_factory=list)
+    next_cursor: str | None = Field(default=None, description="Pass as cursor for the next page; null on the last page")
+
+
+class HourlyCount(BaseModel):
+    """Rollup of one agent over one hour."""
+
+    hour: datetime = Field(description="Start of the hour (UTC)")
+    reports: int = Field(description="Reports that audited the agent")
+    violations: int = Field(description="Violations by the agent")
+    max_risk_score: int = Field(description="Highest risk score of those reports")
+
+
+class AgentSummary(BaseModel):
+    """An agent's audit history, from the hourly rollups (hour granularity)."""
+
+    agent_id: str
+    reports: int = Field(description="Reports that audited the agent")
+    violations: int = Field(description="Violations by the agent")
+    max_risk_score: int = Field(description="Highest risk score of those reports")
+    by_type: dict[str, int] = Field(default_factory=dict, description="Violations per type")
+    by_severity: dict[str, int] = Field(default_factory=dict, description="Violations per severity")
+    hourly: list[HourlyCount] = Field(default_factory=list, description="Hours with activity, oldest first")
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    source TEXT NOT NULL,
+    risk_score INTEGER NOT NULL,
+    violation_count INTEGER NOT NULL,
+    agents TEXT NOT NULL,
+    summary TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS violations (
+    id INTEGER PRIMARY KEY,
+    report_id INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    agent_id TEXT NOT NULL,
+    type TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    description TEXT NOT NULL,
+    recommendation TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reports_ts ON reports (ts);
+CREATE INDEX IF NOT EXISTS violations_ts ON violations (ts);
+CREATE INDEX IF NOT EXISTS violations_agent ON violations (agent_id, ts);
+CREATE INDEX IF NOT EXISTS violations_type ON violations (type, ts);
+CREATE INDEX IF NOT EXISTS violations_severity ON violations (severity, ts);
+CREATE TABLE IF NOT EXISTS agent_hours (
+    agent_id TEXT NOT NULL,
+    hour INTEGER NOT NULL,
+    reports INTEGER NOT NULL,
+    max_risk INTEGER NOT NULL,
+    PRIMARY KEY (agent_id, hour)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS violation_hours (
+    agent_id TEXT NOT NULL,
+    hour INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    severity TEXT NOT NULL,
+    violations INTEGER NOT NULL,
+    max_risk INTEGER NOT NULL,
+    PRIMARY KEY (agent_id, hour, type, severity)
+) WITHOUT ROWID;
+"""
+
+# Fold the reports and violations written after the given row IDs into the hourly
+# rollups (hour = Unix time // 3600)
+_ROLLUP_AGENTS = """
+INSERT INTO agent_hours (agent_id, hour, reports, max_risk)
+SELECT agent.value, CAST(r.ts / 3600 AS INTEGER), COUNT(*), MAX(r.risk_score)
+FROM reports r, json_each(r.agents) agent
+WHERE r.id > ?
+GROUP BY 1, 2
+ON CONFLICT (agent_id, hour) DO UPDATE SET
+    reports = reports + excluded.reports, max_risk = MAX(max_risk, excluded.max_risk)
+"""
+_ROLLUP_VIOLATIONS = """
+INSERT INTO violation_hours (agent_id, hour, type, severity, violations, max_risk)
+SELECT v.agent_id, CAST(v.ts / 3600 AS INTEGER), v.type, v.severity, SUM(v.count), MAX(r.risk_score)
+FROM violations v JOIN reports r ON r.id = v.report_id
+WHERE v.id > ?
+GROUP BY 1, 2, 3, 4
+ON CONFLICT (agent_id, hour, type, severity) DO UPDATE SET
+    violations = violations + excluded.violations, max_risk = MAX(max_risk, excluded.max_risk)
+"""
+
+# One statement per report: SQLite expands the report's JSON into violation rows itself,
+# without the GIL, instead of Python building and binding every row
+_INSERT_VIOLATIONS = """
+INSERT INTO violations (report_id, ts, agent_id, type, severity, count, description, recommendation)
+SELECT ?, ?, json_extract(value, '$.agent_id'), json_extract(value, '$.type'), json_extract(value, '$.severity'),
+       COALESCE(json_extract(value, '$.count'), 1), json_extract(value, '$.description'),
+       json_extract(value, '$.recommendation')
+FROM json_each(?, ?)
+"""
+
+
+class HistoryStore:
+    """
+    Background-written SQLite store of audit reports (path "" disables it).
+
+    record() only enqueues; when the queue holds max_queue reports, new ones are dropped
+    (and counted) rather than slowing the audit down.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        retention_days: float = 30,
+        rollup_retention_days: float = 400,
+        batch_size: int = 500,
+        flush_interval: float = 0.2,
+        max_queue: int = 10_000,
+        compact_interval: float = 3600,
+    ):
+        self.path = path
+        self.retention_days = retention_days
+        self.rollup_retention_days = rollup_retention_days
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.compact_interval = compact_interval
+        self.reports_written = 0
+        self.violations_written = 0
+        self.dropped = 0
+        self.errors = 0
+        self.rows_compacted = 0
+        self._last_compaction = 0.0
+        self._queue: queue.Queue = queue.Queue(max_queue)
+        self._thread: threading.Thread | None = None
+        self._lock = threading.Lock()
+        self._readers = threading.local()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def connect(self) -> sqlite3.Connection:
+        """A new connection to the store, with the schema in place (for the writer or for readers)."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        db = sqlite3.connect(self.path, timeout=10, check_same_thread=False, isolation_level=None)
+        # auto_vacuum only takes effect on a new database (before the first table)
+        db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.executescript(_SCHEMA)
+        return db
+
+    def start(self):
+        """Start the writer thread (no-op when disabled or already running)."""
+        with self._lock:
+            if not self.enabled or self._thread is not None:
+                return
+            db = self.connect()  # fail here, at startup, if the path is unusable
+            self._thread = threading.Thread(target=self._run, args=(db,), name="history-writer", daemon=True)
+            self._thread.start()
+
+    def close(self, timeout: float = 10):
+        """Write what is queued, then stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def record(self, report: BaseModel, source: str = "audit"):
+        """Queue an AuditReport (or BatchAuditReport: one row per report) for writing."""
+        if self._thread is None:
+            return
+        reports = getattr(report, "reports", None)
+        items = [(f"{source}:{key}", value) for key, value in reports.items()] if reports is not None else [(source, report)]
+        now = time.time()
+        for item_source, item in items:
+            try:
+                self._queue.put_nowait((now, item_source, item))
+            except queue.Full:
+                self.dropped += 1
+
+    def _run(self, db: sqlite3.Connection):
+        try:
+            # Linux: nice applies per thread, so the writer only gets CPU that requests leave idle
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        except (AttributeError, OSError):
+            pass
+        self._compact(db)
+        stopping = False
+        while not stopping:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = ()
+            batch = []
+            while item is not None:
+                if item:
+                    batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            stopping = item is None
+            if batch:
+                self._write(db, batch)
+            if time.monotonic() - self._last_compaction >= self.compact_interval:
+                self._compact(db)
+        db.close()
+
+    def _write(self, db: sqlite3.Connection, batch: list[tuple]):
+        try:
+            db.execute("BEGIN")
+            last_report, last_violation = db.execute(
+                "SELECT (SELECT COALESCE(MAX(id), 0) FROM reports), (SELECT COALESCE(MAX(id), 0) FROM violations)"
+            ).fetchone()
+            violations = 0
+            for ts, source, report in batch:
+                cursor = db.execute(
+                    "INSERT INTO reports (ts, source, risk_score, violation_count, agents, summary) VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        ts,
+                        source,
+                        report.risk_score,
+                        len(report.violations) + sum(group.count for group in report.violation_groups),
+                        json.dumps(report.agents_audited),
+                        report.summary,
+                    ),
+                )
+                field = "violation_groups" if report.violation_groups else "violations"
+                if getattr(report, field):
+                    body = report.model_dump_json(include={field})
+                    cursor = db.execute(_INSERT_VIOLATIONS, (cursor.lastrowid, ts, body, f"$.{field}"))
+                    violations += cursor.rowcount
+            db.execute(_ROLLUP_AGENTS, (last_report,))
+            db.execute(_ROLLUP_VIOLATIONS, (last_violation,))
+            db.execute("COMMIT")
+            self.reports_written += len(batch)
+            self.violations_written += violations
+        except sqlite3.Error:
+            self.errors += 1
+            if db.in_transaction:
+                db.execute("ROLLBACK")
+
+    def _compact(self, db: sqlite3.Connection):
+        """Delete rows past the retention periods and give the freed pages back."""
+        self._last_compaction = time.monotonic()
+        now = time.time()
+        try:
+            deleted = 0
+            if self.retention_days > 0:
+                cutoff = now - self.retention_days * 86400
+                deleted += db.execute("DELETE FROM violations WHERE ts < ?", (cutoff,)).rowcount
+                deleted += db.execute("DELETE FROM reports WHERE ts < ?", (cutoff,)).rowcount
+            if self.rollup_retention_days > 0:
+                hour = int((now - self.rollup_retention_days * 86400) // 3600)
+                deleted += db.execute("DELETE FROM agent_hours WHERE hour < ?", (hour,)).rowcount
+                deleted += db.execute("DELETE FROM violation_hours WHERE hour < ?", (hour,)).rowcount
+            if deleted:
+                db.execute("PRAGMA incremental_vacuum")
+                db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self.rows_compacted += deleted
+        except sqlite3.Error:
+            self.errors += 1
+
+    def _reader(self) -> sqlite3.Connection:
+        """This thread's read-only connection (WAL: reads never wait for the writer)."""
+        if not self.enabled:
+            raise HistoryDisabled("Audit history is disabled (set SENTINEL_HISTORY_PATH)")
+        db = getattr(self._readers, "db", None)
+        if db is None:
+            db = self.connect()
+            db.execute("PRAGMA query_only=ON")
+            self._readers.db = db
+        return db
+
+    def violations(
+        self,
+        agent_id: str | None = None,
+        type: str | None = None,
+        severity: str | None = None,
+        since: float | None = None,
+        until: float | None = None,
+        limit: int = 100,
+        cursor: str | None = None,
+    ) -> ViolationPage:
+        """
+        Stored violations matching the filters, newest first (since/until: Unix times).
+
+        Pages are keyset-paginated on (time, id): the cursor names the last row returned,
+        so each page is an index range scan however deep it is. Raises ValueError for a
+        malformed cursor.
+        """
+        conditions, params = [], []
+        for column, value in (("agent_id", agent_id), ("type", type), ("severity", severity)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            conditions.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("ts < ?")
+            params.append(until)
+        if cursor:
+            try:
+                ts, _, row_id = cursor.partition(":")
+                params.extend((float(ts), int(row_id)))
+            except ValueError:
+                raise ValueError(f"Invalid cursor: {cursor}") from None
+            conditions.append("(ts, id) < (?, ?)")
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        rows = self._reader().execute(
+            "SELECT id, report_id, ts, agent_id, type, severity, count, description, recommendation"
+            f" FROM violations {where} ORDER BY ts DESC, id DESC LIMIT ?",
+            (*params, limit + 1),
+        ).fetchall()
+        page = ViolationPage(
+            violations=[
+                StoredViolation(
+                    id=row[0],
+                    report_id=row[1],
+                    timestamp=datetime.fromtimestamp(row[2], timezone.utc),
+                    agent_id=row[3],
+                    type=row[4],
+                    severity=row[5],
+                    count=row[6],
+                    description=row[7],
+                    recommendation=row[8],
+                )
+                for row in rows[:limit]
+            ]
+        )
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            page.next_cursor = f"{last[2]!r}:{last[0]}"
+        return page
+
+    def agent_summary(self, agent_id: str, since: float | None = None, until: float | None = None) -> AgentSummary:
+        """An agent's totals and hourly counts from the rollups (since/until: Unix times, hour granularity)."""
+        first = int(since // 3600) if since is not None else 0
+        last = int(until // 3600) if until is not None else 1 << 62
+        db = self._reader()
+        hours = {
+            hour: HourlyCount(
+                hour=datetime.fromtimestamp(hour * 3600, timezone.utc), reports=reports, violations=0, max_risk_score=risk
+            )
+            for hour, reports, risk in db.execute(
+                "SELECT hour, reports, max_risk FROM agent_hours WHERE agent_id = ? AND hour BETWEEN ? AND ? ORDER BY hour",
+                (agent_id, first, last),
+            )
+        }
+        summary = AgentSummary(agent_id=agent_id, reports=0, violations=0, max_risk_score=0)
+        for hour, kind, severity, count in db.execute(
+            "SELECT hour, type, severity, violations FROM violation_hours WHERE agent_id = ? AND hour BETWEEN ? AND ?",
+            (agent_id, first, last),
+        ):
+            summary.violations += count
+            summary.by_type[kind] = summary.by_type.get(kind, 0) + count
+            summary.by_severity[severity] = summary.by_severity.get(severity, 0) + count
+            if hour in hours:
+                hours[hour].violations += count
+        summary.hourly = list(hours.values())
+        summary.reports = sum(item.reports for item in summary.hourly)
+        summary.max_risk_score = max((item.max_risk_score for item in summary.hourly), default=0)
+        return summary
+
+    def stats(self) -> dict:
+        """Write counters and queue depth."""
+        return {
+            "enabled": self.enabled,
+            "running": self._thread is not None,
+            "path": self.path,
+            "retention_days": self.retention_days,
+            "rollup_retention_days": self.rollup_retention_days,
+            "queued": self._queue.qsize(),
+            "reports_written": self.reports_written,
+            "violations_written": self.violations_written,
+            "dropped": self.dropped,
+            "errors": self.errors,
+            "rows_compacted": self.rows_compacted,
+        }
+
+
+# Shared by the REST API and the MCP server. SENTINEL_HISTORY_PATH (SQLite file, default
+# empty = history off), SENTINEL_HISTORY_RETENTION_DAYS (default 30, 0 = keep forever),
+# SENTINEL_HISTORY_ROLLUP_RETENTION_DAYS (hourly rollups, default 400, 0 = keep forever),
+# SENTINEL_HISTORY_BATCH (reports per write transaction, default 500)
+HISTORY = HistoryStore(
+    os.environ.get("SENTINEL_HISTORY_PATH", "").strip(),
+    retention_days=float(os.environ.get("SENTINEL_HISTORY_RETENTION_DAYS", "30")),
+    rollup_retention_days=float(os.environ.get("SENTINEL_HISTORY_ROLLUP_RETENTION_DAYS", "400")),
+    batch_size=int(os.environ.get("SENTINEL_HISTORY_BATCH", "500")),
+)
@@ -0,0 +1,235 @@
+"""
+Background audit ingestion: accept logs now, audit them on a worker pool.
+
+submit() puts the audit on a bounded in-process queue and returns an audit ID at once,
+so a sender never waits for the audit itself. Worker threads run queued audits in
+order; the result can be fetched by ID until it expires, and is also POSTed to the
+sender's callback URL when one was given.
+
+The queue does not grow without limit. When max_queue audits are waiting, submit()
+raises QueueFull with a Retry-After estimate (queued work / observed audit rate)
+instead of accepting work that would only finish late; once stopped (shutdown) it
+raises IngestUnavailable.
+"""
+
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable
+
+import requests
+from pydantic import BaseModel, Field
+
+from serialization import encode_model
+from tools import AuditReport
+
+
+class QueueFull(Exception):
+    """The ingest queue is at capacity; retry after `retry_after` seconds."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Ingest queue is full; retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class IngestUnavailable(Exception):
+    """The ingest workers are not running (not started, or shutting down)."""
+
+
+class IngestStatus(BaseModel):
+    """State of a background audit, with its report once done."""
+
+    audit_id: str
+    status: str = Field(description="queued | running | done | failed")
+    submitted_at: datetime
+    finished_at: datetime | None = None
+    report: AuditReport | None = Field(default=None, description="Set when status is done")
+    error: str | None = Field(default=None, description="Set when status is failed")
+    callback_url: str | None = None
+    callback_error: str | None = Field(default=None, description="Why the callback POST failed, if it did")
+
+
+class _Job:
+    # status is never modified in place: the worker swaps in an updated copy under the
+    # queue lock, so readers always see one consistent state
+    __slots__ = ("status", "audit")
+
+    def __init__(self, status: IngestStatus, audit: Callable[[], AuditReport]):
+        self.status = status
+        self.audit = audit
+
+
+class IngestQueue:
+    """Bounded queue of audits run by `workers` threads; results are kept result_ttl seconds."""
+
+    def __init__(
+        self,
+        workers: int = 2,
+        max_queue: int = 1000,
+        result_ttl: float = 900,
+        max_results: int = 10_000,
+        callback_timeout: float = 5,
+    ):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.result_ttl = result_ttl
+        self.max_results = max_results
+        self.callback_timeout = callback_timeout
+        self.accepted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+        self.callback_errors = 0
+        self._audit_seconds = 0.0  # moving average of one audit's run time
+        self._queue: queue.Queue = queue.Queue(max_queue)
+        self._jobs: dict[str, _Job] = {}
+        self._finished: OrderedDict[str, float] = OrderedDict()  # audit_id -> monotonic finish time, oldest first
+        self._threads: list[threading.Thread] = []
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return bool(self._threads)
+
+    def start(self):
+        """Start the worker threads (no-op if already running)."""
+        with self._lock:
+            if self._threads:
+                return
+            self._threads = [
+                threading.Thread(target=self._run, name=f"ingest-{i}", daemon=True) for i in range(max(1, self.workers))
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def close(self, timeout: float = 10):
+        """Stop accepting audits, let the workers finish what is queued, then stop them."""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put(None)
+        deadline = time.monotonic() + timeout
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+
+    def retry_after(self) -> int:
+        """Seconds until the queued audits should be done, at the observed audit rate."""
+        seconds = self._queue.qsize() * self._audit_seconds / max(1, len(self._threads))
+        return max(1, min(300, round(seconds)))
+
+    def submit(self, audit: Callable[[], AuditReport], callback_url: str | None = None) -> IngestStatus:
+        """Queue an audit; raises QueueFull or IngestUnavailable instead of waiting."""
+        if not self._threads:
+            raise IngestUnavailable("Ingest workers are not running")
+        status = IngestStatus(
+            audit_id=uuid.uuid4().hex,
+            status="queued",
+            submitted_at=datetime.now(timezone.utc),
+            callback_url=callback_url,
+        )
+        job = _Job(status, audit)
+        with self._lock:
+            self._expire()
+            self._jobs[status.audit_id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self._jobs.pop(status.audit_id, None)
+            self.rejected += 1
+            raise QueueFull(self.retry_after()) from None
+        self.accepted += 1
+        return status.model_copy()  # the worker may already be updating the original
+
+    def get(self, audit_id: str) -> IngestStatus | None:
+        """Status (and report) of an audit, or None if unknown or expired."""
+        with self._lock:
+            self._expire()
+            job = self._jobs.get(audit_id)
+            return job.status.model_copy() if job is not None else None
+
+    def _expire(self):
+        # Finished jobs past their TTL, and the oldest finished ones beyond max_results
+        now = time.monotonic()
+        while self._finished:
+            audit_id, finished = next(iter(self._finished.items()))
+            if len(self._finished) <= self.max_results and now - finished < self.result_ttl:
+                break
+            self._finished.popitem(last=False)
+            self._jobs.pop(audit_id, None)
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            self._process(job)
+
+    def _update(self, job: _Job, **fields) -> IngestStatus:
+        # One assignment under the lock: get() sees the old state or the new one, never a mix
+        status = job.status.model_copy(update=fields)
+        with self._lock:
+            job.status = status
+        return status
+
+    def _process(self, job: _Job):
+        self._update(job, status="running")
+        started = time.monotonic()
+        try:
+            fields = {"report": job.audit(), "status": "done"}
+            self.completed += 1
+        except Exception as e:
+            fields = {"error": f"{type(e).__name__}: {e}", "status": "failed"}
+            self.failed += 1
+        finally:
+            elapsed = time.monotonic() - started
+            self._audit_seconds = elapsed if not self._audit_seconds else 0.8 * self._audit_seconds + 0.2 * elapsed
+            job.audit = None
+        status = self._update(job, finished_at=datetime.now(timezone.utc), **fields)
+        if status.callback_url:
+            error = self._callback(status)
+            if error:
+                self.callback_errors += 1
+                self._update(job, callback_error=error)
+        with self._lock:
+            self._finished[status.audit_id] = time.monotonic()
+
+    def _callback(self, status: IngestStatus) -> str | None:
+        """POST the finished status to its callback URL; why that failed, or None."""
+        body, media_type = encode_model(status)
+        try:
+            response = requests.post(
+                status.callback_url, data=body, headers={"Content-Type": media_type}, timeout=self.callback_timeout
+            )
+        except requests.RequestException as e:
+            return f"{type(e).__name__}: {e}"
+        return f"HTTP {response.status_code}" if response.status_code >= 400 else None
+
+    def stats(self) -> dict:
+        """Queue depth, counters and the current Retry-After estimate."""
+        return {
+            "workers": len(self._threads),
+            "queued": self._queue.qsize(),
+            "max_queue": self.max_queue,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "completed": self.completed,
+            "failed": self.failed,
+            "callback_errors": self.callback_errors,
+            "avg_audit_ms": round(self._audit_seconds * 1000, 2),
+            "retry_after": self.retry_after(),
+        }
+
+
+# Shared by the REST API. SENTINEL_INGEST_WORKERS (audit threads, default 2),
+# SENTINEL_INGEST_QUEUE (queued audits before 429, default 1000),
+# SENTINEL_INGEST_RESULT_TTL (seconds a finished result can be fetched, default 900)
+INGEST = IngestQueue(
+    workers=int(os.environ.get("SENTINEL_INGEST_WORKERS", "2")),
+    max_queue=int(os.environ.get("SENTINEL_INGEST_QUEUE", "1000")),
+    result_ttl=float(os.environ.get("SENTINEL_INGEST_RESULT_TTL", "900")),
+)
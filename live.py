@@ -0,0 +1,183 @@
+"""
+Live audit feed: completed audits pushed to dashboards over Server-Sent Events.
+
+One producer, many subscribers. publish() only queues the report: a background publisher
+thread encodes its events once and hands the same bytes to every subscriber, so the
+request that finished the audit never waits for the encoding (tens of milliseconds for
+a report with tens of thousands of violations) and fan-out costs a list append per
+client rather than a serialization per client. With no subscribers publish() returns
+at once; when the queue is full, reports are dropped and counted.
+
+Each event has an increasing ID and the last `replay` events are kept, so a browser that
+reconnects (EventSource sends Last-Event-ID) receives what it missed. A subscriber that
+falls more than max_pending events behind is cut off instead of buffering without
+limit; its EventSource reconnects and resumes from the replay buffer.
+
+Events:
+    report      {"seq", "source", "risk_score", "summary", "agents_audited", "violation_count"}
+    violations  {"seq", "items": [...]}: the report's violations (or groups), in chunks
+"""
+
+import asyncio
+import itertools
+import queue
+import threading
+from collections import deque
+
+from pydantic import BaseModel
+
+from serialization import dumps
+
+_CHUNK = 500  # violations per "violations" event
+
+
+class _Subscriber:
+    __slots__ = ("loop", "pending", "wake", "lagged")
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.pending: list[bytes] = []
+        self.wake = asyncio.Event()
+        self.lagged = False
+
+
+class LiveFeed:
+    """Fan-out of audit events to SSE subscribers, with a replay buffer for reconnects."""
+
+    def __init__(self, replay: int = 1000, max_pending: int = 5000, keepalive: float = 15, max_queue: int = 1000):
+        self.max_pending = max_pending
+        self.keepalive = keepalive
+        self.published = 0
+        self.lagged = 0
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(max_queue)
+        self._thread: threading.Thread | None = None
+        self._ids = itertools.count(1)
+        self._seq = itertools.count(1)
+        self._recent: deque[tuple[int, bytes]] = deque(maxlen=replay)
+        self._subscribers: set[_Subscriber] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def start(self):
+        """Start the publisher thread (no-op if already running)."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="live-publisher", daemon=True)
+                self._thread.start()
+
+    def close(self, timeout: float = 5):
+        """Publish what is queued, then stop the publisher thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def publish(self, report: BaseModel, source: str = "audit"):
+        """Queue an AuditReport (or BatchAuditReport) for every subscriber; thread-safe, never blocks."""
+        if not self._subscribers or self._thread is None:
+            return
+        try:
+            self._queue.put_nowait((report, source))
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            report, source = item
+            if not self._subscribers:
+                continue  # the last subscriber left while this was queued
+            reports = getattr(report, "reports", None)
+            items = [(f"{source}:{key}", value) for key, value in reports.items()] if reports is not None else [(source, report)]
+            for item_source, item_report in items:
+                self._publish_report(item_report, item_source)
+
+    def _publish_report(self, report: BaseModel, source: str):
+        seq = next(self._seq)
+        violations = report.violation_groups or report.violations
+        events = [
+            (
+                "report",
+                {
+                    "seq": seq,
+                    "source": source,
+                    "risk_score": report.risk_score,
+                    "summary": report.summary,
+                    "agents_audited": report.agents_audited,
+                    "violation_count": len(report.violations) + sum(group.count for group in report.violation_groups),
+                },
+            )
+        ]
+        events += [("violations", {"seq": seq, "items": violations[i : i + _CHUNK]}) for i in range(0, len(violations), _CHUNK)]
+        with self._lock:
+            messages = []
+            for name, data in events:
+                event_id = next(self._ids)
+                message = f"id: {event_id}\nevent: {name}\ndata: {dumps(data)}\n\n".encode()
+                self._recent.append((event_id, message))
+                messages.append(message)
+            subscribers = list(self._subscribers)
+            self.published += 1
+        for subscriber in subscribers:
+            subscriber.loop.call_soon_threadsafe(self._deliver, subscriber, messages)
+
+    def _deliver(self, subscriber: _Subscriber, messages: list[bytes]):
+        # Runs on the subscriber's event loop. Once a batch has been dropped nothing more is
+        # queued: pending then ends at the last event before the gap, so the client's
+        # Last-Event-ID points there and its reconnect replays the dropped events
+        if subscriber.lagged:
+            return
+        if len(subscriber.pending) + len(messages) > self.max_pending:
+            subscriber.lagged = True
+        else:
+            subscriber.pending.extend(messages)
+        subscriber.wake.set()
+
+    async def stream(self, last_event_id: str | None = None):
+        """SSE byte stream for one client: missed events (after last_event_id), then live ones."""
+        subscriber = _Subscriber(asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.add(subscriber)
+            if last_event_id and last_event_id.isdigit():
+                after = int(last_event_id)
+                subscriber.pending = [message for event_id, message in self._recent if event_id > after]
+        try:
+            yield b"retry: 2000\n\n"
+            while True:
+                if not subscriber.pending:
+                    if subscriber.lagged:
+                        self.lagged += 1
+                        return  # the client reconnects with Last-Event-ID and replays from _recent
+                    try:
+                        await asyncio.wait_for(subscriber.wake.wait(), self.keepalive)
+                    except asyncio.TimeoutError:
+                        yield b": keepalive\n\n"
+                    subscriber.wake.clear()
+                    continue
+                messages, subscriber.pending = subscriber.pending, []
+                yield b"".join(messages)
+        finally:
+            with self._lock:
+                self._subscribers.discard(subscriber)
+
+    def stats(self) -> dict:
+        """Subscriber count and publish counters."""
+        return {
+            "subscribers": self.subscribers,
+            "reports_published": self.published,
+            "subscribers_lagged": self.lagged,
+            "reports_dropped": self.dropped,
+            "queued": self._queue.qsize(),
+            "replay_buffer": len(self._recent),
+        }
+
+
+# Shared by the REST API (one process: dashboards see audits served by this server)
+LIVE = LiveFeed()
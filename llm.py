@@ -0,0 +1,289 @@
+"""
+Async, pooled LLM access for use_ai audits.
+
+One AsyncOpenAI client per API key is shared by every request, so connections (and their
+TLS sessions) are reused instead of set up per audit. A global concurrency limit caps
+calls in flight: an audit that finds the limit reached, or whose call times out or
+fails, gets the rule-based report right away instead of queueing behind the model.
+
+Hybrid audits run the rules first and send the model only the suspicious lines no rule
+matched, deduplicated and batched.
+
+Any OpenAI-compatible server works via OPENAI_BASE_URL (see mock_openai.py for a local one).
+"""
+
+import asyncio
+import os
+import threading
+import time
+from typing import NamedTuple
+
+from tools import (
+    _AI_CHUNK_CONCURRENCY,
+    _AI_MODEL,
+    _AUDIT_SYSTEM_PROMPT,
+    LLM_FALLBACKS,
+    LLM_SECONDS,
+    LLM_TOKENS,
+    RESULT_CACHE,
+    RULESET_VERSION,
+    AuditReport,
+    LLMUsage,
+    _ai_cache_key,
+    _ai_disk_key,
+    _ai_messages,
+    _cache_ai_chunk,
+    _cache_key,
+    _cache_report,
+    _cached_ai_chunk,
+    _hybrid_rule_pass,
+    _merge_reports,
+    _parse_ai_report,
+    _split_chunks,
+    audit_agent_activity,
+)
+
+
+class LLMReply(NamedTuple):
+    text: str
+    prompt_tokens: int
+    completion_tokens: int
+
+
+class LLMPool:
+    """Shared async chat-completions access with a concurrency limit and per-call timeout."""
+
+    def __init__(self, max_concurrency: int = 8, timeout: float = 20.0, max_retries: int = 0):
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.calls = 0
+        self.busy = 0  # calls refused because max_concurrency were in flight
+        self.timeouts = 0
+        self.errors = 0
+        self.invalid = 0  # replies that were not a valid audit report
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._latency = 0.0
+        self._in_flight = 0
+        self._clients: dict[str, tuple[asyncio.AbstractEventLoop, object]] = {}  # api_key -> (loop, client)
+        self._lock = threading.Lock()
+
+    def _client(self, api_key: str):
+        # httpx connection pools belong to the event loop they were created on
+        loop = asyncio.get_running_loop()
+        entry = self._clients.get(api_key)
+        if entry is None or entry[0] is not loop:
+            from openai import AsyncOpenAI
+
+            # The SDK's own timeout is a backstop; wait_for below enforces self.timeout
+            client = AsyncOpenAI(api_key=api_key, timeout=self.timeout + 5, max_retries=self.max_retries)
+            entry = (loop, client)
+            self._clients[api_key] = entry
+        return entry[1]
+
+    async def complete(self, messages: list[dict], api_key: str) -> LLMReply | None:
+        """The model's reply, or None if the limit was reached or the call failed or timed out."""
+        with self._lock:
+            if self._in_flight >= self.max_concurrency:
+                self.busy += 1
+                LLM_FALLBACKS.inc(1, ("async", "busy"))
+                return None
+            self._in_flight += 1
+            self.calls += 1
+        start = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(
+                self._client(api_key).chat.completions.create(model=_AI_MODEL, messages=messages, temperature=0.1),
+                self.timeout,
+            )
+            usage = response.usage
+            reply = LLMReply(
+                response.choices[0].message.content or "",
+                usage.prompt_tokens if usage else 0,
+                usage.completion_tokens if usage else 0,
+            )
+            self.prompt_tokens += reply.prompt_tokens
+            self.completion_tokens += reply.completion_tokens
+            LLM_TOKENS.inc(reply.prompt_tokens, ("async", "prompt"))
+            LLM_TOKENS.inc(reply.completion_tokens, ("async", "completion"))
+            return reply
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            LLM_FALLBACKS.inc(1, ("async", "timeout"))
+        except Exception:  # API errors, connection errors, openai not installed
+            self.errors += 1
+            LLM_FALLBACKS.inc(1, ("async", "error"))
+        finally:
+            elapsed = time.perf_counter() - start
+            self._latency += elapsed
+            LLM_SECONDS.observe(elapsed, ("async",))
+            with self._lock:
+                self._in_flight -= 1
+        return None
+
+    async def aclose(self):
+        """Close the clients created on the running event loop."""
+        loop = asyncio.get_running_loop()
+        for api_key, (client_loop, client) in list(self._clients.items()):
+            if client_loop is loop:
+                del self._clients[api_key]
+                await client.close()
+
+    def stats(self) -> dict:
+        """Call counters, fallbacks by cause and mean latency."""
+        return {
+            "model": _AI_MODEL,
+            "max_concurrency": self.max_concurrency,
+            "timeout_seconds": self.timeout,
+            "in_flight": self._in_flight,
+            "calls": self.calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "fallbacks": {"busy": self.busy, "timeout": self.timeouts, "error": self.errors, "invalid": self.invalid},
+            "mean_latency_ms": round(self._latency / self.calls * 1000, 1) if self.calls else 0.0,
+        }
+
+
+# Shared by the REST API. SENTINEL_AI_CONCURRENCY (calls in flight, default 8),
+# SENTINEL_AI_TIMEOUT (seconds per call, default 20), SENTINEL_AI_MAX_RETRIES (default 0)
+LLM = LLMPool(
+    max_concurrency=int(os.environ.get("SENTINEL_AI_CONCURRENCY", "8")),
+    timeout=float(os.environ.get("SENTINEL_AI_TIMEOUT", "20")),
+    max_retries=int(os.environ.get("SENTINEL_AI_MAX_RETRIES", "0")),
+)
+
+
+async def audit_agent_activity_ai_async(activity_logs: str, api_key: str | None = None) -> AuditReport:
+    """
+    Async audit_agent_activity_ai: same reports and cache, through the shared LLM pool.
+
+    Long logs are split into chunks audited concurrently and merged in chunk order. A
+    chunk falls back to the rule-based audit (run off the event loop) when the
+    concurrency limit is reached, or when its call fails, times out or returns something
+    that is not an audit report; without an API key the whole log does.
+    """
+    if not activity_logs or not activity_logs.strip():
+        return AuditReport(
+            risk_score=0,
+            violations=[],
+            summary="No activity logs provided for audit.",
+            agents_audited=[],
+        )
+
+    api_key = api_key or os.environ.get("OPENAI_API_KEY", "").strip()
+    if api_key:
+        key = _ai_cache_key(activity_logs)
+        report = RESULT_CACHE.get(key)
+        if report is not None:
+            return report
+
+        limit = asyncio.Semaphore(_AI_CHUNK_CONCURRENCY)
+
+        async def audit_chunk(chunk: str) -> tuple[AuditReport, bool]:
+            # Disk lookups are SQLite point queries (well under a millisecond)
+            chunk_key = _ai_disk_key(chunk)
+            report = _cached_ai_chunk(chunk_key)
+            if report is not None:
+                return report, True
+            async with limit:
+                reply = await LLM.complete(_ai_messages(chunk), api_key)
+            if reply is not None:
+                try:
+                    return _cache_ai_chunk(chunk_key, _parse_ai_report(reply.text)), True
+                except Exception:
+                    LLM.invalid += 1
+                    LLM_FALLBACKS.inc(1, ("async", "invalid"))
+            return await asyncio.to_thread(audit_agent_activity, chunk), False
+
+        results = await asyncio.gather(*(audit_chunk(chunk) for chunk in _split_chunks(activity_logs)))
+        report = _merge_reports(results)
+        return _cache_report(key, report) if all(from_llm for _, from_llm in results) else report
+
+    return await asyncio.to_thread(audit_agent_activity, activity_logs)
+
+
+# SENTINEL_HYBRID_BATCH_CHARS: log text per LLM call in hybrid audits (default 6000)
+HYBRID_BATCH_CHARS = int(os.environ.get("SENTINEL_HYBRID_BATCH_CHARS", "6000"))
+
+
+def _estimate_tokens(messages: list[dict]) -> int:
+    return sum(len(message["content"]) for message in messages) // 4
+
+
+def _hybrid_batches(lines: list[tuple[str, int]]) -> list[str]:
+    """Unresolved lines (with repeat counts) packed into batches of about HYBRID_BATCH_CHARS."""
+    batches, batch, size = [], [], 0
+    for line, n in lines:
+        entry = f"{line}  [repeated {n} times]" if n > 1 else line
+        if batch and size + len(entry) > HYBRID_BATCH_CHARS:
+            batches.append("\n".join(batch))
+            batch, size = [], 0
+        batch.append(entry)
+        size += len(entry) + 1
+    if batch:
+        batches.append("\n".join(batch))
+    return batches
+
+
+async def audit_agent_activity_hybrid(activity_logs: str, api_key: str | None = None) -> AuditReport:
+    """
+    Rules first, LLM for the rest: one AuditReport with both kinds of findings.
+
+    The rule engine audits every line; only lines no rule matched that still look
+    suspicious (_SUSPICIOUS_RE), deduplicated by number-masked text, go to the LLM in
+    concurrent batches. LLM violations not already reported are added and the risk score
+    and summary are recomputed. report.llm_usage shows the tokens saved against sending
+    the whole log. Batches that fail leave their lines to the rules; without an API key
+    this is the plain rule-based audit.
+    """
+    api_key = api_key or os.environ.get("OPENAI_API_KEY", "").strip()
+    if not api_key or not activity_logs or not activity_logs.strip():
+        return await asyncio.to_thread(audit_agent_activity, activity_logs)
+
+    key = _cache_key("hybrid", _AI_MODEL, _AUDIT_SYSTEM_PROMPT, RULESET_VERSION, activity_logs=activity_logs)
+    report = RESULT_CACHE.get(key)
+    if report is not None:
+        return report
+
+    audit, unresolved = await asyncio.to_thread(_hybrid_rule_pass, activity_logs)
+    batches = _hybrid_batches(unresolved)
+    prompts = [_ai_messages(batch) for batch in batches]
+    replies = await asyncio.gather(*(LLM.complete(messages, api_key) for messages in prompts))
+
+    calls = failed = 0
+    seen = {(v.agent_id, v.type, v.description.lower()) for v in audit.violations}
+    for batch, reply in zip(batches, replies):
+        try:
+            found = _parse_ai_report(reply.text) if reply is not None else None
+        except Exception:
+            LLM.invalid += 1
+            LLM_FALLBACKS.inc(1, ("async", "invalid"))
+            found = None
+        if found is None:
+            failed += 1
+            continue
+        calls += 1
+        for violation in found.violations:
+            violation_key = (violation.agent_id, violation.type, violation.description.lower())
+            if violation_key not in seen:
+                seen.add(violation_key)
+                audit.add_violation(violation)
+        # Only agents that really appear in the lines sent (the model may invent names)
+        audit.agents_seen.update(agent for agent in found.agents_audited if agent and agent in batch)
+
+    full_tokens = _estimate_tokens(_ai_messages(activity_logs))
+    sent_tokens = sum(_estimate_tokens(messages) for messages in prompts)
+    report = audit.report()
+    report.llm_usage = LLMUsage(
+        lines_total=audit.audited_lines,
+        lines_sent=len(unresolved),
+        llm_calls=calls,
+        failed_calls=failed,
+        estimated_full_tokens=full_tokens,
+        estimated_sent_tokens=sent_tokens,
+        tokens_saved=full_tokens - sent_tokens,
+    )
+    if not failed:
+        _cache_report(key, report)
+    return report
@@ -5,22 +5,86 @@ Provides governance and observability for AI agents running in Archestra.
 Audits agent activity logs and flags cost, security, and operational violations.
 """
 
+import asyncio
+import codecs
+import json
 import os
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from datetime import datetime
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from pydantic import BaseModel, Field
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.routing import Match
+from pydantic import BaseModel, Field, HttpUrl
+
+from compression import CompressionMiddleware, DecompressionMiddleware
+from events import audit_events, parse_events
+from history import HISTORY, AgentSummary, HistoryDisabled, ViolationPage
+from ingest import INGEST, IngestStatus, IngestUnavailable, QueueFull
+from live import LIVE
+from metrics import REGISTRY
+from llm import LLM, audit_agent_activity_ai_async, audit_agent_activity_hybrid
+from parallel import AUDITOR
+from serialization import dumps, model_response
+from sessions import SESSIONS, AuditSession
+from tools import (
+    AuditAccumulator,
+    AuditReport,
+    _ENGINE,
+    AI_DISK_CACHE,
+    RESULT_CACHE,
+    RULESET_VERSION,
+    BatchAuditReport,
+    LineSplitter,
+    count_lines,
+    count_violations,
+    observe_audit,
+    warm_ai_cache,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pre-warm the audit worker processes (only if SENTINEL_AUDIT_WORKERS is set)
+    await run_in_threadpool(AUDITOR.start)
+    # Recently used LLM reports from the on-disk cache (SENTINEL_AI_CACHE_PATH)
+    await run_in_threadpool(warm_ai_cache)
+    # Audit history writer (only if SENTINEL_HISTORY_PATH is set)
+    await run_in_threadpool(HISTORY.start)
+    # Background audit workers for /ingest, and the /live publisher
+    INGEST.start()
+    LIVE.start()
+    async with AsyncExitStack() as stack:
+        if _mcp is not None:
+            # MCP streamable-http sessions (unified mode, SENTINEL_MCP_PATH)
+            await stack.enter_async_context(_mcp.session_manager.run())
+        yield
+    await run_in_threadpool(INGEST.close)
+    await run_in_threadpool(LIVE.close)
+    await run_in_threadpool(HISTORY.close)
+    AUDITOR.shutdown()
+    await LLM.aclose()
+    AI_DISK_CACHE.close()
 
-from tools import AuditReport, audit_agent_activity, audit_agent_activity_ai
 
 app = FastAPI(
     title="SentinelMCP - AI Agent Auditor",
     description="MCP-native auditor for AI agent governance: cost control, security, and observability",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
+# Compressed bodies. SENTINEL_MAX_INFLATED_MB: cap on a gzip/zstd request body once
+# inflated (default 256); SENTINEL_COMPRESS_MIN_BYTES: smallest response compressed (default 1024)
+app.add_middleware(
+    DecompressionMiddleware,
+    max_bytes=int(float(os.environ.get("SENTINEL_MAX_INFLATED_MB", "256")) * (1 << 20)),
+)
+app.add_middleware(CompressionMiddleware, minimum_size=int(os.environ.get("SENTINEL_COMPRESS_MIN_BYTES", "1024")))
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -37,14 +101,70 @@ class AuditRequest(BaseModel):
     """Audit request: activity logs from AI agents."""
 
     activity_logs: str = Field(
-        description="Raw activity logs from one or more AI agents running in Archestra"
+        default="", description="Raw activity logs from one or more AI agents running in Archestra"
+    )
+    events: list[dict] | None = Field(
+        default=None,
+        description="Structured agent events (agent_id, model, cost, calls, window, status, ...), audited by field "
+        "after activity_logs; rule-based only",
     )
     use_ai: bool = Field(default=False, description="Use LLM for audit (set OPENAI_API_KEY); else rule-based")
+    hybrid: bool = Field(
+        default=False,
+        description="Rules first; only suspicious lines no rule matched go to the LLM (report.llm_usage shows tokens saved)",
+    )
+    aggregate: bool = Field(
+        default=False, description="Rule-based only: group violations by (agent, type, rule) instead of one per line"
+    )
+
+
+class IngestRequest(AuditRequest):
+    """Audit request run in the background: /ingest returns an audit ID right away."""
+
+    callback_url: HttpUrl | None = Field(
+        default=None, description="POST the finished IngestStatus (with the report) to this URL"
+    )
+
+
+class BatchAuditRequest(BaseModel):
+    """Batch audit request: independent log sets keyed by caller ID (e.g. agent or tenant)."""
+
+    log_sets: dict[str, str] = Field(description="Raw activity logs per ID; each set gets its own report")
+    aggregate: bool = Field(default=False, description="Group each report's violations by (agent, type, rule)")
+
+
+class SessionLogs(BaseModel):
+    """Logs for an audit session: new lines (append) or the agent's full log (sync)."""
+
+    activity_logs: str = Field(description="Raw activity logs from one or more AI agents")
+
+
+class SessionReport(BaseModel):
+    """Current state of an audit session."""
+
+    session_id: str = Field(description="Session to pass to later append/sync calls")
+    lines_audited: int = Field(description="Log lines audited in this session so far")
+    new_lines: int = Field(default=0, description="Lines audited by this call")
+    resets: int = Field(default=0, description="Times a sync did not extend the audited log and it was re-audited")
+    report: AuditReport = Field(description="Audit report over the whole session log")
 
 
 # ---------- API endpoints ----------
 
 
+def _record(report: AuditReport | BatchAuditReport, source: str):
+    """A completed audit: store it in the history, push it to live dashboards, count its violations."""
+    HISTORY.record(report, source)
+    LIVE.publish(report, source)
+    count_violations(report)
+
+
+def _body_size(request: Request, logs: str) -> int:
+    """Request body bytes (Content-Length), or the log text's size when the body was compressed."""
+    length = request.headers.get("content-length")
+    return int(length) if length and length.isdigit() else len(logs)
+
+
 @app.get("/health")
 def health():
     """Health check for Render and load balancers."""
@@ -52,16 +172,372 @@ def health():
 
 
 @app.post("/audit", response_model=AuditReport)
-def audit(request: AuditRequest) -> AuditReport:
+async def audit(request: AuditRequest, http_request: Request) -> Response:
     """
     Audit AI agent activity logs and return governance report.
 
     Use use_ai=true to analyze with an LLM (handles varied phrasings; requires OPENAI_API_KEY).
-    Default is fast rule-based audit (no API key).
+    LLM calls share one pooled client; when SENTINEL_AI_CONCURRENCY calls are already in
+    flight, or a call fails or times out, the rule-based report is returned instead.
+    hybrid=true runs the rules first and sends the LLM only the suspicious lines they did not match.
+    Default is fast rule-based audit (no API key); very large logs are sharded across
+    worker processes when SENTINEL_AUDIT_WORKERS is set. aggregate=true returns
+    violation_groups (count, first/last line, min/max value) instead of one violation per line.
+    events are audited by their typed fields, without regex matching (see events.py).
+    Send Accept: application/msgpack for a MessagePack body instead of JSON.
+    """
+    started = time.perf_counter()
+    if request.events is not None:
+        records = request.activity_logs.splitlines() + request.events
+        report, source = await run_in_threadpool(audit_events, records, request.aggregate), "events"
+    elif request.hybrid:
+        report, source = await audit_agent_activity_hybrid(request.activity_logs), "hybrid"
+    elif request.use_ai:
+        report, source = await audit_agent_activity_ai_async(request.activity_logs), "ai"
+    else:
+        report, source = await run_in_threadpool(AUDITOR.audit, request.activity_logs, request.aggregate), "rules"
+    _record(report, source)
+    response = model_response(report, http_request)
+    lines = count_lines(request.activity_logs) + len(request.events or ())
+    size = _body_size(http_request, request.activity_logs)
+    observe_audit("audit", source, time.perf_counter() - started, lines, size)
+    return response
+
+
+# SENTINEL_MAX_BATCH_SETS: most log sets accepted by one /audit/batch call (default 1000)
+MAX_BATCH_SETS = int(os.environ.get("SENTINEL_MAX_BATCH_SETS", "1000"))
+
+
+@app.post("/audit/batch", response_model=BatchAuditReport)
+def audit_batch(request: BatchAuditRequest, http_request: Request) -> Response:
+    """
+    Audit many independent log sets in one round trip; returns one AuditReport per ID.
+
+    Rule-based only. Sets share the compiled rule engine and, with SENTINEL_AUDIT_WORKERS,
+    large batches are spread over the worker processes. Accept: application/msgpack
+    returns MessagePack.
+    """
+    if len(request.log_sets) > MAX_BATCH_SETS:
+        raise HTTPException(
+            status_code=413, detail=f"Too many log sets: {len(request.log_sets)} (max {MAX_BATCH_SETS})"
+        )
+    started = time.perf_counter()
+    report = AUDITOR.audit_batch(request.log_sets, request.aggregate)
+    _record(report, "batch")
+    response = model_response(report, http_request)
+    lines = sum(count_lines(logs) for logs in request.log_sets.values())
+    size = _body_size(http_request, "") or sum(len(logs) for logs in request.log_sets.values())
+    observe_audit("audit_batch", "rules", time.perf_counter() - started, lines, size)
+    return response
+
+
+@app.post("/audit/events", response_model=AuditReport)
+async def audit_event_records(request: Request, aggregate: bool = False) -> Response:
+    """
+    Audit structured agent events: the fast path for agents that emit JSON records.
+
+    Body: NDJSON (one event object per line), a JSON array of events, or {"events": [...]};
+    fields are listed in events.py. The body is decoded with orjson (when installed) and
+    each event is checked against its fields, without rendering it to text or running the
+    regexes. Returns the same AuditReport as /audit.
+    """
+    body = await request.body()
+    started = time.perf_counter()
+    try:
+        report, count = await run_in_threadpool(_audit_event_body, body, aggregate)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    _record(report, "events")
+    response = model_response(report, request)
+    observe_audit("audit_events", "events", time.perf_counter() - started, count, len(body))
+    return response
+
+
+def _audit_event_body(body: bytes, aggregate: bool) -> tuple[AuditReport, int]:
+    """Parse and audit an events body (one worker-thread hop); also returns the event count."""
+    events = parse_events(body)
+    return audit_events(events, aggregate), len(events)
+
+
+# ---------- Background ingestion ----------
+
+
+def _ingest_audit(request: IngestRequest, loop: asyncio.AbstractEventLoop) -> AuditReport:
+    """Worker: the audit /audit would run; LLM calls go through the server's event loop (shared pool)."""
+    started = time.perf_counter()
+    if request.events is not None:
+        report, source = audit_events(request.activity_logs.splitlines() + request.events, request.aggregate), "events"
+    elif request.hybrid:
+        coroutine = audit_agent_activity_hybrid(request.activity_logs)
+        report, source = asyncio.run_coroutine_threadsafe(coroutine, loop).result(), "hybrid"
+    elif request.use_ai:
+        coroutine = audit_agent_activity_ai_async(request.activity_logs)
+        report, source = asyncio.run_coroutine_threadsafe(coroutine, loop).result(), "ai"
+    else:
+        report, source = AUDITOR.audit(request.activity_logs, request.aggregate), "rules"
+    _record(report, f"ingest-{source}")
+    lines = count_lines(request.activity_logs) + len(request.events or ())
+    observe_audit("ingest", source, time.perf_counter() - started, lines, len(request.activity_logs))
+    return report
+
+
+@app.post("/ingest", response_model=IngestStatus, status_code=202)
+async def ingest(request: IngestRequest, http_request: Request) -> Response:
+    """
+    Queue an audit and return its ID at once; the report is fetched from /ingest/{id}
+    (or POSTed to callback_url). A full queue answers 429 with Retry-After instead of
+    making the sender wait.
     """
-    if request.use_ai:
-        return audit_agent_activity_ai(request.activity_logs)
-    return audit_agent_activity(request.activity_logs)
+    loop = asyncio.get_running_loop()
+    callback_url = str(request.callback_url) if request.callback_url else None
+    try:
+        status = INGEST.submit(lambda: _ingest_audit(request, loop), callback_url)
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except IngestUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    response = model_response(status, http_request)
+    response.status_code = 202
+    response.headers["Location"] = f"/ingest/{status.audit_id}"
+    return response
+
+
+@app.get("/ingest/{audit_id}", response_model=IngestStatus)
+def ingest_status(audit_id: str, http_request: Request) -> Response:
+    """Status of a queued audit, with the report once it is done."""
+    status = INGEST.get(audit_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired audit: {audit_id}")
+    return model_response(status, http_request)
+
+
+# ---------- Streaming audit ----------
+
+
+class _DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose generator reads the request body while the response is sent.
+
+    The stock response also listens for client disconnects on receive(), which would
+    swallow body chunks meant for request.stream(); the body reader sees disconnects itself.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+
+
+def _audit_records(audit: AuditAccumulator, records: list[str], ndjson: bool) -> list[dict]:
+    """Audit one batch of body lines (runs in the threadpool); returns the events to stream."""
+    events = []
+    for record in records:
+        if ndjson:
+            if not record.strip():
+                continue
+            try:
+                payload = json.loads(record)
+                text = payload if isinstance(payload, str) else payload["activity_logs"]
+                lines = text.splitlines()
+            except (ValueError, TypeError, KeyError, AttributeError):
+                events.append({"event": "error", "detail": f"Invalid NDJSON record: {record[:200]}"})
+                continue
+        else:
+            lines = (record,)
+
+        for line in lines:
+            violation = audit.feed(line)
+            if violation:
+                events.append({"event": "violation", "line": audit.lines, "violation": violation})
+    return events
+
+
+def _format_event(event: dict, sse: bool) -> str:
+    """One streamed event as an NDJSON line or an SSE message."""
+    if sse:
+        name = event.pop("event")
+        return f"event: {name}\ndata: {dumps(event)}\n\n"
+    return dumps(event) + "\n"
+
+
+async def _stream_audit(request: Request, ndjson: bool, sse: bool, include_violations: bool):
+    """Generator pipeline: body chunks -> decoded text -> lines -> audit -> events."""
+    audit = AuditAccumulator(keep_violations=include_violations)
+    splitter = LineSplitter()
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    started, size = time.perf_counter(), 0
+
+    try:
+        async for chunk in request.stream():
+            size += len(chunk)
+            records = splitter.feed(decoder.decode(chunk))
+            if records:
+                for event in await run_in_threadpool(_audit_records, audit, records, ndjson):
+                    yield _format_event(event, sse)
+    except HTTPException as e:
+        # A compressed body that is corrupt or inflates past SENTINEL_MAX_INFLATED_MB
+        yield _format_event({"event": "error", "status": e.status_code, "detail": e.detail}, sse)
+        return
+
+    records = splitter.feed(decoder.decode(b"", final=True)) + splitter.flush()
+    for event in await run_in_threadpool(_audit_records, audit, records, ndjson):
+        yield _format_event(event, sse)
+    report = audit.report()
+    if include_violations:  # without them the report has nothing to store per violation
+        _record(report, "stream")
+    observe_audit("audit_stream", "rules", time.perf_counter() - started, audit.lines, size)
+    yield _format_event({"event": "report", "report": report}, sse)
+
+
+@app.post("/audit/stream")
+async def audit_stream(request: Request, include_violations: bool = False):
+    """
+    Audit a streamed log upload line by line as it arrives.
+
+    Body: plain text (one log line per line) or NDJSON (Content-Type: application/x-ndjson)
+    where each record is {"activity_logs": "..."} or a JSON string.
+    Response: NDJSON events, or SSE with Accept: text/event-stream. Each violation is sent
+    as soon as its line is audited ({"event": "violation", "line": n, "violation": {...}});
+    the last event is the final AuditReport ({"event": "report", "report": {...}}). Its
+    violations list is empty unless include_violations=true, so memory stays constant.
+    """
+    ndjson = "ndjson" in request.headers.get("content-type", "")
+    sse = "text/event-stream" in request.headers.get("accept", "")
+    return _DuplexStreamingResponse(
+        _stream_audit(request, ndjson, sse, include_violations),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+    )
+
+
+# ---------- Audit sessions ----------
+
+
+def _session(session_id: str) -> AuditSession:
+    session = SESSIONS.get(session_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Unknown or expired session: {session_id}")
+    return session
+
+
+def _session_report(session: AuditSession, new_lines: int = 0) -> SessionReport:
+    return SessionReport(
+        session_id=session.session_id,
+        lines_audited=session.lines,
+        new_lines=new_lines,
+        resets=session.resets,
+        report=session.report(),
+    )
+
+
+@app.post("/sessions", response_model=SessionReport)
+def open_session(logs: SessionLogs | None = None) -> SessionReport:
+    """Open an incremental audit session, optionally with the first logs."""
+    session = SESSIONS.open()
+    new_lines = session.append(logs.activity_logs) if logs else 0
+    return _session_report(session, new_lines)
+
+
+@app.post("/sessions/{session_id}/append", response_model=SessionReport)
+def append_session(session_id: str, logs: SessionLogs) -> SessionReport:
+    """Audit only the new lines sent and return the updated session report."""
+    session = _session(session_id)
+    return _session_report(session, session.append(logs.activity_logs))
+
+
+@app.post("/sessions/{session_id}/sync", response_model=SessionReport)
+def sync_session(session_id: str, logs: SessionLogs) -> SessionReport:
+    """Send the agent's full log again; only lines not audited yet are processed."""
+    session = _session(session_id)
+    return _session_report(session, session.sync(logs.activity_logs))
+
+
+@app.get("/sessions/{session_id}", response_model=SessionReport)
+def get_session(session_id: str) -> SessionReport:
+    """Current report of a session."""
+    return _session_report(_session(session_id))
+
+
+@app.delete("/sessions/{session_id}")
+def close_session(session_id: str):
+    """Close a session and free its state."""
+    if not SESSIONS.close(session_id):
+        raise HTTPException(status_code=404, detail=f"Unknown or expired session: {session_id}")
+    return {"closed": session_id}
+
+
+# ---------- Live feed ----------
+
+
+@app.get("/live")
+async def live(request: Request):
+    """
+    Server-Sent Events of audits as they complete, from every client: a "report" event
+    (risk score, summary) then "violations" events in chunks. Reconnecting browsers send
+    Last-Event-ID and get the events they missed.
+    """
+    return StreamingResponse(
+        LIVE.stream(request.headers.get("last-event-id")),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ---------- Audit history (SENTINEL_HISTORY_PATH) ----------
+
+
+def _timestamp(value: datetime | None) -> float | None:
+    return value.timestamp() if value is not None else None
+
+
+@app.get("/violations", response_model=ViolationPage)
+def list_violations(
+    agent_id: str | None = None,
+    type: str | None = None,
+    severity: str | None = None,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: str | None = None,
+) -> ViolationPage:
+    """Recorded violations, newest first; pass next_cursor back as cursor for the next page."""
+    try:
+        return HISTORY.violations(agent_id, type, severity, _timestamp(since), _timestamp(until), limit, cursor)
+    except HistoryDisabled as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@app.get("/agents/{agent_id}/summary", response_model=AgentSummary)
+def agent_summary(agent_id: str, since: datetime | None = None, until: datetime | None = None) -> AgentSummary:
+    """An agent's recorded reports, violations by type and severity, and hourly counts."""
+    try:
+        summary = HISTORY.agent_summary(agent_id, _timestamp(since), _timestamp(until))
+    except HistoryDisabled as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if not summary.hourly:
+        raise HTTPException(status_code=404, detail=f"No audit history for agent: {agent_id}")
+    return summary
+
+
+@app.get("/stats")
+def stats():
+    """Runtime statistics: result caches and per-line memo counters, LLM calls and fallbacks."""
+    return {
+        "ruleset_version": RULESET_VERSION,
+        "result_cache": RESULT_CACHE.stats(),
+        "ai_disk_cache": AI_DISK_CACHE.stats(),
+        "history": HISTORY.stats(),
+        "ingest": INGEST.stats(),
+        "live": LIVE.stats(),
+        "mcp_path": MCP_PATH or None,
+        "line_memo": _ENGINE.memo_stats(),
+        "llm": LLM.stats(),
+    }
+
+
+@app.get("/metrics")
+def metrics():
+    """Prometheus metrics: audit latency/lines/bytes, violations, per-rule counters, LLM calls, caches."""
+    return Response(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 @app.get("/api")
@@ -72,8 +548,23 @@ def api_info():
         "description": "MCP-native governance for AI agents in Archestra",
         "endpoints": {
             "/health": "Health check",
-            "/audit": "POST - Audit logs (body: activity_logs, use_ai?); use_ai=true = LLM (OPENAI_API_KEY)",
+            "/audit": "POST - Audit logs (body: activity_logs, events?, use_ai?, hybrid?, aggregate?); use_ai=true = LLM (OPENAI_API_KEY), "
+            "hybrid=true = rules + LLM for unmatched suspicious lines only",
+            "/audit/batch": "POST - Audit many log sets in one call (body: log_sets {id: logs}); one report per id",
+            "/audit/events": "POST - Audit structured agent events (NDJSON, JSON array or {events: [...]}) by field",
+            "/ingest": "POST - Queue an audit (body as /audit, plus callback_url?); 202 with audit_id, "
+            "GET /ingest/{id} for the report; 429 + Retry-After when the queue is full",
+            "/audit/stream": "POST - Streamed audit of a plain-text or NDJSON body; NDJSON/SSE events, final report",
+            "/sessions": "POST - Open an incremental audit session; then /sessions/{id}/append (new lines) "
+            "or /sessions/{id}/sync (full log, only the unaudited tail is processed), GET/DELETE /sessions/{id}",
+            "/live": "GET - Server-Sent Events: every completed audit (report, then violations in chunks)",
+            "/violations": "GET - Recorded violations, newest first (filters: agent_id, type, severity, since, until; "
+            "limit, cursor for keyset pages)",
+            "/agents/{id}/summary": "GET - An agent's recorded totals by type and severity, hourly counts (since?, until?)",
+            "/stats": "GET - Runtime statistics (result cache, line memo, LLM calls/fallbacks)",
+            "/metrics": "GET - Prometheus metrics (audit latency, lines, bytes, violations, per-rule and LLM counters)",
             "/mock-data": "GET - Sample agent activity for testing",
+            **({MCP_PATH: "MCP streamable-http endpoint (unified mode)"} if MCP_PATH else {}),
         },
         "repository": "https://github.com/incruder1/sentinel_mcp",
     }
@@ -109,8 +600,30 @@ if os.path.exists(static_dir):
         return FileResponse(os.path.join(static_dir, "index.html"))
 
 
-# MCP server for Archestra runs separately: python mcp_server.py
-# Do not mount MCP here or it overrides / and /health on Render.
+# ---------- MCP (unified mode) ----------
+
+# SENTINEL_MCP_PATH (e.g. "/mcp"): also serve the MCP streamable-http endpoint from this
+# process, at exactly that path, sharing the rule engine, caches, LLM pool, history and
+# live feed with the REST API. Default empty: MCP runs separately (python mcp_server.py).
+# The MCP app is not mounted at / (that would shadow / and /health); only its one route is
+# added, and a path that an existing route already serves is refused at startup.
+MCP_PATH = os.environ.get("SENTINEL_MCP_PATH", "").strip().rstrip("/")
+_mcp = None
+if MCP_PATH:
+    if not MCP_PATH.startswith("/"):
+        MCP_PATH = "/" + MCP_PATH
+    for route in app.routes:
+        for method in ("GET", "POST", "DELETE"):
+            if route.matches({"type": "http", "path": MCP_PATH, "method": method})[0] != Match.NONE:
+                raise RuntimeError(f"SENTINEL_MCP_PATH={MCP_PATH} collides with the route {getattr(route, 'path', route)}")
+
+    from mcp_server import mcp as _mcp
+
+    _mcp.settings.streamable_http_path = MCP_PATH
+    # Only the MCP endpoint; the MCP server's own /metrics is this app's /metrics here
+    app.router.routes.extend(
+        route for route in _mcp.streamable_http_app().routes if getattr(route, "path", None) == MCP_PATH
+    )
 
 
 # ---------- Entrypoint ----------
@@ -1,11 +1,39 @@
 """
 SentinelMCP - Pure MCP Server for Archestra Integration
-Separate from the FastAPI REST server.
+Runs on its own (python mcp_server.py, port 10001) or inside the REST server at
+SENTINEL_MCP_PATH (unified mode, see main.py), sharing its state.
 """
 
-from mcp.server.fastmcp import FastMCP
+import os
+import time
+
+import anyio
+from mcp.server.fastmcp import Context, FastMCP
 from mcp.server.transport_security import TransportSecuritySettings
-from tools import AuditReport, audit_agent_activity
+from mcp.types import ToolAnnotations
+from starlette.requests import Request
+from starlette.responses import Response
+from events import feed_events
+from history import HISTORY, AgentSummary, ViolationPage
+from live import LIVE
+from metrics import REGISTRY
+from parallel import AUDITOR
+from tools import (
+    RESULT_CACHE,
+    AuditAccumulator,
+    AuditReport,
+    BatchAuditReport,
+    _cache_report,
+    _rules_cache_key,
+    count_lines,
+    count_violations,
+    observe_audit,
+)
+
+# SENTINEL_MCP_SLICE_LINES: lines (or events) the audit tool hands to a worker thread at a
+# time; longer inputs report progress after each slice and can be cancelled between slices
+# (default 20000)
+_SLICE_LINES = int(os.environ.get("SENTINEL_MCP_SLICE_LINES", "20000"))
 
 # Create MCP server with relaxed security for Docker connectivity
 transport_security = TransportSecuritySettings(
@@ -22,8 +50,34 @@ mcp = FastMCP(
 )
 
 
+def _record(report: AuditReport | BatchAuditReport, source: str):
+    """A completed audit: into the history, to live dashboards (unified mode), and the violation counters."""
+    HISTORY.record(report, source)
+    LIVE.publish(report, source)
+    count_violations(report)
+
+
+async def _audit_records(records: list[dict | str], aggregate: bool, ctx: Context) -> AuditReport:
+    """
+    Audit in slices on a worker thread, so the event loop keeps serving other clients.
+
+    After each slice the client gets a progress notification (if it sent a progress
+    token). A cancelled call stops at the end of the slice being audited.
+    """
+    audit = AuditAccumulator(aggregate=aggregate)
+    total = len(records)
+    for start in range(0, total, _SLICE_LINES):
+        await anyio.to_thread.run_sync(feed_events, audit, records[start : start + _SLICE_LINES])
+        done = min(start + _SLICE_LINES, total)
+        if total > _SLICE_LINES:
+            await ctx.report_progress(done, total, f"{done}/{total} lines, {audit.violation_count} violation(s) so far")
+    return audit.report()
+
+
 @mcp.tool()
-def audit_agent_activity_tool(activity_logs: str) -> AuditReport:
+async def audit_agent_activity_tool(
+    ctx: Context, activity_logs: str = "", aggregate: bool = False, events: list[dict] | None = None
+) -> AuditReport:
     """
     Audit AI agent activity logs and return governance report.
 
@@ -35,15 +89,106 @@ def audit_agent_activity_tool(activity_logs: str) -> AuditReport:
 
     Args:
         activity_logs: Raw activity logs from one or more AI agents
+        aggregate: Group repeated violations by (agent, type, rule) with counts and line ranges
+        events: Structured agent events instead of (or after) log text, e.g.
+            {"agent_id": "Agent-7", "model": "gpt-4o", "cost": 450, "calls": 1200,
+             "window": 5, "status": "rate_limited"}; checked by field, no text parsing
 
     Returns:
         Structured audit report with risk score, violations, and recommendations
     """
-    return audit_agent_activity(activity_logs)
+    started = time.perf_counter()
+    if events is not None:
+        report = await _audit_records(activity_logs.splitlines() + events, aggregate, ctx)
+    else:
+        key = _rules_cache_key(activity_logs, aggregate)
+        report = RESULT_CACHE.get(key)
+        if report is None:
+            report = _cache_report(key, await _audit_records(activity_logs.splitlines(), aggregate, ctx))
+    _record(report, "mcp")
+    lines = count_lines(activity_logs) + len(events or ())
+    mode = "events" if events is not None else "rules"
+    observe_audit("mcp", mode, time.perf_counter() - started, lines, len(activity_logs))
+    return report
+
+
+@mcp.tool()
+async def audit_agent_activity_batch_tool(log_sets: dict[str, str], aggregate: bool = False) -> BatchAuditReport:
+    """
+    Audit many agents' activity logs in one call, one governance report per log set.
+
+    Same checks as audit_agent_activity_tool, applied to each set independently.
+
+    Args:
+        log_sets: Raw activity logs keyed by caller-chosen ID (e.g. agent or tenant name)
+        aggregate: Group repeated violations in each report by (agent, type, rule)
+
+    Returns:
+        Reports keyed by the same IDs, each with risk score, violations, and recommendations
+    """
+    started = time.perf_counter()
+    report = await anyio.to_thread.run_sync(AUDITOR.audit_batch, log_sets, aggregate)
+    _record(report, "mcp-batch")
+    lines = sum(count_lines(logs) for logs in log_sets.values())
+    observe_audit("mcp_batch", "rules", time.perf_counter() - started, lines, sum(map(len, log_sets.values())))
+    return report
+
+
+def _since(hours: float | None) -> float | None:
+    return time.time() - hours * 3600 if hours is not None else None
+
+
+@mcp.tool(annotations=ToolAnnotations(readOnlyHint=True))
+def query_violations_tool(
+    agent_id: str | None = None,
+    type: str | None = None,
+    severity: str | None = None,
+    since_hours: float | None = None,
+    limit: int = 100,
+    cursor: str | None = None,
+) -> ViolationPage:
+    """
+    Look up violations recorded by past audits, newest first (needs SENTINEL_HISTORY_PATH).
+
+    Args:
+        agent_id: Only this agent, e.g. "Agent-7"
+        type: Only this type: COST_SPIKE | SECURITY | RATE_LIMIT | ANOMALY
+        severity: Only this severity: CRITICAL | HIGH | MEDIUM | LOW
+        since_hours: Only the last N hours
+        limit: Page size (1-1000)
+        cursor: next_cursor from the previous page
+
+    Returns:
+        A page of stored violations and the cursor for the next page (null on the last)
+    """
+    return HISTORY.violations(agent_id, type, severity, _since(since_hours), None, max(1, min(limit, 1000)), cursor)
+
+
+@mcp.tool(annotations=ToolAnnotations(readOnlyHint=True))
+def agent_summary_tool(agent_id: str, since_hours: float | None = None) -> AgentSummary:
+    """
+    Summarize an agent's audit history (needs SENTINEL_HISTORY_PATH).
+
+    Args:
+        agent_id: Agent to summarize, e.g. "Agent-7"
+        since_hours: Only the last N hours (hour granularity)
+
+    Returns:
+        Reports and violations recorded for the agent, by type and severity, with hourly counts
+    """
+    return HISTORY.agent_summary(agent_id, _since(since_hours))
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics(request: Request) -> Response:
+    """Prometheus metrics of the standalone server (in unified mode the REST /metrics is served)."""
+    return Response(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
 
 
 if __name__ == "__main__":
     # Run the MCP server
     print("Starting SentinelMCP server on 0.0.0.0:10001...")
     print("Transport security: DNS rebinding protection disabled, all hosts allowed")
+    AUDITOR.start()  # worker processes for large batches, if SENTINEL_AUDIT_WORKERS is set
+    HISTORY.start()  # audit history writer, if SENTINEL_HISTORY_PATH is set
     mcp.run(transport="streamable-http")
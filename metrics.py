@@ -0,0 +1,142 @@
+"""
+Prometheus metrics: a small in-process registry rendered in the text exposition format.
+
+Counters and histograms keep plain numbers per label set behind one lock per metric,
+which is cheap enough for once-per-request updates. Hot loops (the rule engine, per
+line) do not call into this module at all: they keep their own counters, and collector
+callbacks turn those into samples only when /metrics is scraped.
+
+No client library is needed; the output is the standard text format (version 0.0.4).
+"""
+
+import bisect
+import math
+import threading
+from typing import Callable, Iterable
+
+# Seconds; covers sub-millisecond rule audits through multi-second LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+# A collector yields (name, type, help, [(labels, value), ...]) at scrape time
+Collector = Callable[[], Iterable[tuple[str, str, str, list[tuple[dict[str, str], float]]]]]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    """Metrics and collectors rendered together by render()."""
+
+    def __init__(self):
+        self._metrics: list = []
+        self._collectors: list[Collector] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Collector):
+        """Call collector at every scrape; it yields metric families."""
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text format."""
+        lines = []
+        for metric in list(self._metrics):
+            lines.extend(metric.render())
+        for collector in list(self._collectors):
+            for name, kind, help_text, samples in collector():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(f"{name}{_labels(labels)} {_number(value)}" for labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+
+# Shared by the REST API and the MCP server (one registry per process)
+REGISTRY = Registry()
+
+
+class Counter:
+    """Monotonic counter with optional labels; inc(amount, labels) with label values in labelnames order."""
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = (), registry: Registry = REGISTRY):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def inc(self, amount: float = 1, labels: tuple[str, ...] = ()):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels: tuple[str, ...] = ()) -> float:
+        return self._values.get(labels, 0)
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = list(self._values.items())
+        for labels, value in values:
+            lines.append(f"{self.name}{_labels(dict(zip(self.labelnames, labels)))} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    """Histogram with fixed upper bounds; observe(value, labels)."""
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+        registry: Registry = REGISTRY,
+    ):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict[tuple[str, ...], list] = {}  # labels -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def observe(self, value: float, labels: tuple[str, ...] = ()):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(labels, list(values)) for labels, values in self._series.items()]
+        for labels, values in series:
+            named = dict(zip(self.labelnames, labels))
+            cumulative = 0
+            for bound, count in zip((*self.buckets, math.inf), values):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels({**named, 'le': _number(float(bound))})} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(named)} {_number(values[-1])}")
+            lines.append(f"{self.name}_count{_labels(named)} {cumulative}")
+        return lines
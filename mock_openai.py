@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Local mock of the OpenAI chat-completions API, for exercising use_ai audits offline.
+
+Answers POST /v1/chat/completions with the rule-based audit of the logs in the last user
+message, formatted like the model's JSON reply, after an optional delay. Errors can be
+injected to exercise the fallbacks.
+
+Usage: python mock_openai.py [--port 8001] [--delay-ms 500] [--fail-rate 0.1]
+       OPENAI_BASE_URL=http://localhost:8001/v1 OPENAI_API_KEY=test uvicorn main:app
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+from fastapi import FastAPI, HTTPException, Request
+
+from tools import audit_agent_activity
+
+app = FastAPI(title="Mock OpenAI-compatible API")
+app.state.delay = 0.0
+app.state.fail_rate = 0.0
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    await asyncio.sleep(app.state.delay)
+    if random.random() < app.state.fail_rate:
+        raise HTTPException(status_code=500, detail="Injected failure")
+
+    messages = body.get("messages", [])
+    prompt = messages[-1]["content"] if messages else ""
+    logs = prompt.split("\n\n", 1)[-1]
+    report = audit_agent_activity(logs)
+    content = report.model_dump_json(include={"risk_score", "violations", "summary", "agents_audited"})
+    prompt_tokens = sum(len(m.get("content", "")) for m in messages) // 4
+
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "mock"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": len(content) // 4,
+            "total_tokens": prompt_tokens + len(content) // 4,
+        },
+    }
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--delay-ms", type=float, default=500, help="Simulated model latency")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of calls answered with HTTP 500")
+    args = parser.parse_args()
+    app.state.delay = args.delay_ms / 1000
+    app.state.fail_rate = args.fail_rate
+    uvicorn.run(app, host="127.0.0.1", port=args.port)
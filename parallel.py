@@ -0,0 +1,163 @@
+"""
+Parallel audit of very large payloads across a pool of worker processes.
+
+The rule engine is pure Python, so one audit uses one core no matter how many threads
+serve requests. ShardedAuditor splits a large log into line-aligned shards, audits them
+in a pre-warmed process pool and merges the partial results in shard order, which gives
+exactly the report audit_agent_activity would return. Small inputs are audited serially,
+where shipping the text to another process would cost more than it saves.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from tools import (
+    RESULT_CACHE,
+    AuditAccumulator,
+    AuditReport,
+    BatchAuditReport,
+    _cache_report,
+    _rules_cache_key,
+    audit_agent_activity,
+    audit_agent_activity_batch,
+)
+
+
+def _audit_shard(text: str, aggregate: bool = False) -> AuditAccumulator:
+    """Worker: audit one shard of whole lines."""
+    audit = AuditAccumulator(aggregate=aggregate)
+    for line in text.splitlines():
+        audit.feed(line)
+    return audit
+
+
+def _audit_sets(texts: list[str], aggregate: bool = False) -> list[AuditAccumulator]:
+    """Worker: audit several independent log sets."""
+    return [_audit_shard(text or "", aggregate) for text in texts]
+
+
+def _warm() -> int:
+    """Worker: no-op task that forces the process (and its rule engine) to start."""
+    return os.getpid()
+
+
+def split_shards(text: str, shards: int) -> list[str]:
+    """
+    Split text into at most `shards` pieces of similar size, each ending after a newline.
+
+    Cutting only after "\\n" keeps every line (and every \\r\\n pair) in one piece, so the
+    pieces' splitlines() concatenate to text.splitlines().
+    """
+    pieces = []
+    start = 0
+    for i in range(1, shards):
+        end = text.find("\n", max(start, len(text) * i // shards)) + 1
+        if not end:
+            break
+        pieces.append(text[start:end])
+        start = end
+    pieces.append(text[start:])
+    return pieces
+
+
+class ShardedAuditor:
+    """Rule-based audit that fans large inputs out to a process pool (workers=0 disables it)."""
+
+    def __init__(self, workers: int = 0, min_bytes: int = 1 << 20):
+        self.workers = workers
+        self.min_bytes = min_bytes
+        self._pool: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._pool is not None
+
+    def start(self):
+        """Start the worker processes and wait until each one has loaded the rule engine."""
+        with self._lock:
+            if self._pool is not None or self.workers < 1:
+                return
+            # spawn, not fork: the server process has threads (fork could copy a held lock)
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            for future in [self._pool.submit(_warm) for _ in range(self.workers)]:
+                future.result()
+
+    def shutdown(self):
+        """Stop the worker processes."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    def audit(self, activity_logs: str, aggregate: bool = False) -> AuditReport:
+        """Same report as audit_agent_activity; sharded when the pool runs and the input is large."""
+        pool = self._pool
+        if pool is None or len(activity_logs or "") < self.min_bytes:
+            return audit_agent_activity(activity_logs, aggregate)
+
+        key = _rules_cache_key(activity_logs, aggregate)
+        report = RESULT_CACHE.get(key)
+        if report is not None:
+            return report
+
+        shards = split_shards(activity_logs, self.workers)
+        try:
+            results = list(pool.map(_audit_shard, shards, [aggregate] * len(shards)))
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); answer serially rather than fail the request
+            return audit_agent_activity(activity_logs, aggregate)
+
+        audit = results[0]
+        for partial in results[1:]:
+            audit.merge(partial)
+        return _cache_report(key, audit.report())
+
+    def audit_batch(self, log_sets: dict[str, str], aggregate: bool = False) -> BatchAuditReport:
+        """Same reports as audit_agent_activity_batch; sets are spread over the pool when large."""
+        pool = self._pool
+        total = sum(len(logs or "") for logs in log_sets.values())
+        if pool is None or total < self.min_bytes:
+            return audit_agent_activity_batch(log_sets, aggregate)
+        if len(log_sets) == 1:
+            return BatchAuditReport(reports={set_id: self.audit(logs, aggregate) for set_id, logs in log_sets.items()})
+
+        reports: dict[str, AuditReport] = {}
+        cache_keys: dict[str, bytes] = {}
+        for set_id, logs in log_sets.items():
+            cache_keys[set_id] = _rules_cache_key(logs, aggregate)
+            report = RESULT_CACHE.get(cache_keys[set_id])
+            if report is not None:
+                reports[set_id] = report
+
+        # One task per worker: largest uncached sets first, each to the least loaded group
+        groups: list[list[str]] = [[] for _ in range(self.workers)]
+        loads = [0] * self.workers
+        missing = [set_id for set_id in log_sets if set_id not in reports]
+        for set_id in sorted(missing, key=lambda k: len(log_sets[k] or ""), reverse=True):
+            i = loads.index(min(loads))
+            groups[i].append(set_id)
+            loads[i] += len(log_sets[set_id] or "")
+        groups = [ids for ids in groups if ids]
+
+        try:
+            results = pool.map(
+                _audit_sets, [[log_sets[set_id] for set_id in ids] for ids in groups], [aggregate] * len(groups)
+            )
+            for ids, partials in zip(groups, results):
+                for set_id, audit in zip(ids, partials):
+                    reports[set_id] = _cache_report(cache_keys[set_id], audit.report())
+        except BrokenProcessPool:
+            return audit_agent_activity_batch(log_sets, aggregate)
+        return BatchAuditReport(reports={set_id: reports[set_id] for set_id in log_sets})
+
+
+# Shared by the REST API. SENTINEL_AUDIT_WORKERS (processes, default 0 = serial only),
+# SENTINEL_PARALLEL_MIN_BYTES (smallest input audited in parallel, default 1 MiB)
+AUDITOR = ShardedAuditor(
+    workers=int(os.environ.get("SENTINEL_AUDIT_WORKERS", "0")),
+    min_bytes=int(os.environ.get("SENTINEL_PARALLEL_MIN_BYTES", str(1 << 20))),
+)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+SentinelMCP command line: audit log files on disk with the tools.py rule engine.
+
+The file is memory-mapped and decoded one newline-aligned block at a time, so a
+multi-GB archive is never held in memory as one Python string. With --workers the
+file is split into line-aligned byte ranges audited by separate processes; the
+merged report is identical to a single-process run. Violations are aggregated per
+(agent, type, rule) unless --raw asks for one entry per violating line.
+
+Usage: python sentinel.py audit <file> [--workers N] [--raw] [--output report.json]
+"""
+
+import argparse
+import json
+import mmap
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from tools import AuditAccumulator
+
+BLOCK_BYTES = 8 << 20  # bytes decoded at a time
+
+
+def _line_aligned(data: mmap.mmap, offset: int) -> int:
+    """First offset at or after `offset` that starts a line (or len(data))."""
+    if offset <= 0:
+        return 0
+    end = data.find(b"\n", offset - 1) + 1
+    return end or len(data)
+
+
+def audit_range(path: str, start: int, end: int, aggregate: bool = True) -> AuditAccumulator:
+    """
+    Audit the lines in bytes [start, end) of a file; both ends must be line-aligned.
+
+    Blocks are cut right after a newline, so splitting each decoded block gives the same
+    lines as splitting the whole decoded file (a UTF-8 sequence never contains a newline).
+    """
+    audit = AuditAccumulator(aggregate=aggregate)
+    with open(path, "rb") as f:
+        if start >= end:
+            return audit
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            while start < end:
+                stop = min(end, _line_aligned(data, start + BLOCK_BYTES))
+                for line in data[start:stop].decode("utf-8", errors="replace").splitlines():
+                    audit.feed(line)
+                start = stop
+    return audit
+
+
+def audit_file(path: str, workers: int = 1, aggregate: bool = True) -> AuditAccumulator:
+    """Audit a whole file, in `workers` processes when more than one."""
+    size = os.path.getsize(path)
+    if workers <= 1 or size < BLOCK_BYTES:
+        return audit_range(path, 0, size, aggregate)
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        bounds = sorted({_line_aligned(data, size * i // workers) for i in range(workers)} | {size})
+    with ProcessPoolExecutor(workers) as pool:
+        n = len(bounds) - 1
+        results = list(pool.map(audit_range, [path] * n, bounds[:-1], bounds[1:], [aggregate] * n))
+
+    audit = results[0]
+    for partial in results[1:]:
+        audit.merge(partial)
+    return audit
+
+
+def cmd_audit(args) -> int:
+    size = os.path.getsize(args.file)
+    start = time.perf_counter()
+    audit = audit_file(args.file, args.workers, aggregate=not args.raw)
+    report = audit.report()
+    seconds = max(time.perf_counter() - start, 1e-9)
+
+    result = {
+        "file": args.file,
+        "bytes": size,
+        "lines": audit.lines,
+        "workers": args.workers,
+        "seconds": round(seconds, 3),
+        "mb_per_s": round(size / 1e6 / seconds, 2),
+        "lines_per_s": round(audit.lines / seconds),
+        "report": report.model_dump(),
+    }
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as out:
+            out.write(text + "\n")
+    else:
+        print(text)
+
+    print(
+        f"Audited {audit.lines:,} lines ({size / 1e6:.1f} MB) in {seconds:.2f}s: "
+        f"{result['mb_per_s']} MB/s, {result['lines_per_s']:,} lines/s. "
+        f"Risk {report.risk_score}, {audit.violation_count} violation(s).",
+        file=sys.stderr,
+    )
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="sentinel", description="SentinelMCP – AI Agent Auditor")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    audit = commands.add_parser("audit", help="Audit an agent activity log file and write a JSON report")
+    audit.add_argument("file", help="Log file (UTF-8 text, one activity line per line)")
+    audit.add_argument("--workers", type=int, default=1, help="Worker processes (default 1)")
+    audit.add_argument("--raw", action="store_true", help="One violation per line instead of aggregated groups")
+    audit.add_argument("-o", "--output", help="Write the JSON report here instead of stdout")
+    audit.set_defaults(run=cmd_audit)
+
+    args = parser.parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""
+Fast response encoding for audit reports.
+
+With response_model=AuditReport, FastAPI validates the report the audit just built and
+then serializes it field by field; for reports with thousands of violations that costs
+more than the audit. model_response encodes the report once with pydantic-core's Rust
+JSON serializer (no validation), or as MessagePack when the client asks for it with
+Accept: application/msgpack and msgpack is installed. dumps encodes streamed events with
+orjson when installed.
+"""
+
+import json
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+try:
+    import orjson  # fast JSON encoder (Rust); json is the fallback
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack  # optional: MessagePack responses
+except ImportError:
+    msgpack = None
+
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
+
+def wants_msgpack(accept: str) -> bool:
+    """True if the Accept header asks for MessagePack and it can be produced."""
+    return msgpack is not None and any(media_type in accept for media_type in MSGPACK_TYPES)
+
+
+def encode_model(model: BaseModel, accept: str = "") -> tuple[bytes, str]:
+    """(body, media type) of a model: MessagePack if accepted, else JSON."""
+    if wants_msgpack(accept):
+        return msgpack.packb(model.model_dump()), "application/msgpack"
+    return model.__pydantic_serializer__.to_json(model), "application/json"
+
+
+def model_response(model: BaseModel, request: Request) -> Response:
+    """
+    Response for a model the endpoint built itself. Returning a Response makes FastAPI
+    skip response_model validation (which stays declared for the OpenAPI schema).
+    """
+    body, media_type = encode_model(model, request.headers.get("accept", ""))
+    return Response(body, media_type=media_type)
+
+
+def _default(value):
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value) -> str:
+    """JSON text of value; pydantic models inside it are dumped as dicts."""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default).decode()
+    return json.dumps(value, default=_default)
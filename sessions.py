@@ -0,0 +1,152 @@
+"""
+Stateful audit sessions: audit a growing activity log incrementally.
+
+Agents re-send their whole activity log on every audit. A session remembers how much
+of the log it has already audited (byte count plus a digest of that text), so each call
+only runs the rule engine over the new lines. Idle sessions expire after a TTL and the
+least recently used ones are evicted beyond a size limit.
+"""
+
+import hashlib
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from tools import _LINE_BREAKS, AuditAccumulator, AuditReport
+
+
+class AuditSession:
+    """One incrementally audited log; all methods are safe to call from several threads."""
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.last_used = time.monotonic()
+        self.resets = 0  # times a sync did not extend the audited log and it was re-audited
+        self._lock = threading.Lock()
+        self._start()
+
+    def _start(self):
+        self._audit = AuditAccumulator()
+        self._digest = hashlib.blake2b(digest_size=16)
+        self._size = 0  # UTF-8 bytes of log text audited so far
+        self._last_char = ""
+
+    @property
+    def lines(self) -> int:
+        """Physical log lines audited so far."""
+        return self._audit.lines
+
+    def _consume(self, text: str, data: bytes | memoryview):
+        """Audit text as the continuation of the session log (data is its UTF-8 encoding)."""
+        if not text:
+            return
+        self._digest.update(data)
+        self._size += len(data)
+        last, self._last_char = self._last_char, text[-1]
+        if last == "\r" and text[0] == "\n":
+            text = text[1:]  # second half of a \r\n split between calls
+        elif last and last not in _LINE_BREAKS:
+            # The previous text ended mid-line; this one starts with the break that ends it
+            text = text[2:] if text.startswith("\r\n") else text[1:]
+        for line in text.splitlines():
+            self._audit.feed(line)
+
+    def _ends_mid_line(self) -> bool:
+        return bool(self._last_char) and self._last_char not in _LINE_BREAKS
+
+    def append(self, activity_logs: str) -> int:
+        """Audit new log lines (a delta). Returns the number of lines audited."""
+        with self._lock:
+            self.last_used = time.monotonic()
+            before = self.lines
+            if self._ends_mid_line():
+                # Appended text starts a new line, as if the log had been "\n".join-ed
+                self._consume("\n", b"\n")
+            self._consume(activity_logs, activity_logs.encode())
+            return self.lines - before
+
+    def sync(self, activity_logs: str) -> int:
+        """
+        Audit a full re-sent log, processing only what was not audited yet.
+
+        If the log no longer starts with the text already audited (rotated, truncated or
+        its last line was extended) the session starts over on the whole log.
+        Returns the number of lines audited by this call.
+        """
+        data = memoryview(activity_logs.encode())
+        with self._lock:
+            self.last_used = time.monotonic()
+            before = self.lines
+            start = self._size
+            extends = (
+                len(data) >= start
+                and hashlib.blake2b(data[:start], digest_size=16).digest() == self._digest.digest()
+            )
+            delta = data[start:].tobytes().decode() if extends else ""
+            if delta and self._ends_mid_line() and delta[0] not in _LINE_BREAKS:
+                extends = False
+            if not extends:
+                self.resets += 1
+                self._start()
+                before = start = 0
+                delta = activity_logs
+            self._consume(delta, data[start:])
+            return self.lines - before
+
+    def report(self) -> AuditReport:
+        """Audit report over the whole session log."""
+        with self._lock:
+            self.last_used = time.monotonic()
+            return self._audit.report()
+
+
+class AuditSessionStore:
+    """Open sessions by id, with idle TTL expiry and LRU eviction beyond max_sessions."""
+
+    def __init__(self, ttl: float = 900, max_sessions: int = 1000):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._sessions: OrderedDict[str, AuditSession] = OrderedDict()  # least recently used first
+        self._lock = threading.Lock()
+
+    def _evict(self):
+        now = time.monotonic()
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if len(self._sessions) <= self.max_sessions and now - session.last_used < self.ttl:
+                break
+            self._sessions.popitem(last=False)
+
+    def open(self) -> AuditSession:
+        """Create a new, empty session."""
+        session = AuditSession(uuid.uuid4().hex)
+        with self._lock:
+            self._sessions[session.session_id] = session
+            self._evict()
+        return session
+
+    def get(self, session_id: str) -> AuditSession | None:
+        """Session by id, or None if unknown or expired."""
+        with self._lock:
+            self._evict()
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+            return session
+
+    def close(self, session_id: str) -> bool:
+        """Drop a session; False if it did not exist."""
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+# Shared by the REST API. SENTINEL_SESSION_TTL (seconds idle, default 900), SENTINEL_MAX_SESSIONS (default 1000)
+SESSIONS = AuditSessionStore(
+    ttl=float(os.environ.get("SENTINEL_SESSION_TTL", "900")),
+    max_sessions=int(os.environ.get("SENTINEL_MAX_SESSIONS", "1000")),
+)
@@ -0,0 +1,66 @@
+"""
+Checks for compression.py: request bodies inflated under the size cap.
+
+Run: python -m pytest test_compression.py
+"""
+
+import gzip
+import json
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from compression import BodyTooLarge, DecompressionMiddleware, Inflater, zstandard
+
+CAP = 1 << 20
+BOMB = b"0" * (16 << 20)  # compresses to a few KB, inflates to 16 MB
+
+
+def _app() -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        return {"bytes": len(await request.body())}
+
+    app.add_middleware(DecompressionMiddleware, max_bytes=CAP)
+    return app
+
+
+def test_gzip_bomb_in_one_chunk_is_too_large():
+    with pytest.raises(BodyTooLarge):
+        Inflater("gzip", CAP).feed(gzip.compress(BOMB), final=True)
+
+
+def test_gzip_bomb_in_pieces_is_too_large():
+    body = gzip.compress(BOMB)
+    inflater = Inflater("gzip", CAP)
+    with pytest.raises(BodyTooLarge):
+        for i in range(0, len(body), 512):
+            inflater.feed(body[i : i + 512], final=i + 512 >= len(body))
+
+
+@pytest.mark.skipif(zstandard is None, reason="zstandard not installed")
+def test_zstd_bomb_in_one_chunk_is_too_large():
+    with pytest.raises(BodyTooLarge):
+        Inflater("zstd", CAP).feed(zstandard.ZstdCompressor().compress(BOMB), final=True)
+
+
+def test_truncated_gzip_is_invalid():
+    with pytest.raises(ValueError):
+        Inflater("gzip", CAP).feed(gzip.compress(b"Agent-A: ok\n" * 100)[:-10], final=True)
+
+
+def test_gzip_body_under_the_cap_inflates():
+    logs = b"Agent-A: Normal operation\n" * 1000
+    assert Inflater("gzip", CAP).feed(gzip.compress(logs), final=True) == logs
+
+
+def test_bomb_gets_413_and_corrupt_body_400():
+    client = TestClient(_app())
+    headers = {"Content-Encoding": "gzip", "Content-Type": "application/json"}
+    assert client.post("/echo", content=gzip.compress(BOMB), headers=headers).status_code == 413
+    assert client.post("/echo", content=gzip.compress(BOMB)[:-10], headers=headers).status_code == 413
+    corrupt = gzip.compress(json.dumps({"activity_logs": "x"}).encode())[:-10]
+    assert client.post("/echo", content=corrupt, headers=headers).status_code == 400
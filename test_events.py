@@ -0,0 +1,42 @@
+"""
+Checks for events.py: structured events audited by field.
+
+Run: python -m pytest test_events.py
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from events import audit_event_body, audit_events
+
+NON_FINITE = ["1e400", "inf", "-Infinity", "nan", float("inf"), float("nan")]
+
+
+@pytest.mark.parametrize("value", NON_FINITE)
+@pytest.mark.parametrize("field", ["cost", "calls", "errors", "consecutive_errors", "retries", "repeated", "window"])
+def test_non_finite_numbers_are_skipped(field, value):
+    report = audit_events([{"agent_id": "Agent-1", "calls": 500, field: value}])
+    assert report.agents_audited == ["Agent-1"]
+
+
+def test_non_finite_cost_is_not_a_violation():
+    assert audit_events([{"agent_id": "Agent-1", "cost": "1e400"}]).violations == []
+    assert len(audit_events([{"agent_id": "Agent-1", "cost": "900"}]).violations) == 1
+
+
+def test_json_infinity_in_body():
+    # orjson rejects these as invalid JSON; the json fallback decodes them to inf
+    try:
+        report = audit_event_body(b'{"agent_id": "Agent-1", "cost": Infinity}\n{"agent_id": "Agent-2", "cost": 1e400}')
+    except ValueError:
+        return
+    assert report.violations == []
+
+
+def test_endpoints_do_not_fail_on_non_finite_numbers():
+    client = TestClient(main.app)
+    event = {"agent_id": "Agent-1", "cost": "1e400", "calls": "inf", "window": "nan"}
+    assert client.post("/audit/events", json=event).status_code == 200
+    assert client.post("/audit/events", content=b'{"agent_id": "Agent-1", "cost": 1e400}').status_code in (200, 400)
+    assert client.post("/audit", json={"activity_logs": "", "events": [event]}).status_code == 200
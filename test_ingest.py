@@ -0,0 +1,66 @@
+"""
+Checks for ingest.py: status snapshots returned by get() are consistent while the
+worker updates them.
+
+Run: python -m pytest test_ingest.py
+"""
+
+import sys
+import time
+
+from ingest import IngestQueue
+from tools import audit_agent_activity
+
+
+def _consistent(status) -> bool:
+    if status.status in ("queued", "running"):
+        return status.finished_at is None and status.report is None and status.error is None
+    if status.status == "done":
+        return status.finished_at is not None and status.report is not None and status.error is None
+    return status.finished_at is not None and status.report is None and status.error is not None
+
+
+def test_get_returns_a_snapshot():
+    ingest = IngestQueue(workers=1)
+    ingest.start()
+    try:
+        audit_id = ingest.submit(lambda: audit_agent_activity("Agent-A: ok")).audit_id
+        first = ingest.get(audit_id)
+        assert first is not ingest.get(audit_id)
+        first.status = "tampered"
+        assert ingest.get(audit_id).status != "tampered"
+    finally:
+        ingest.close()
+
+
+def test_polled_status_is_never_a_mix():
+    ingest = IngestQueue(workers=1, callback_timeout=0.5)
+    ingest.start()
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # interleave the poller with the worker as finely as possible
+
+    def audit():
+        time.sleep(0.05)
+        return audit_agent_activity("Agent-A: Rate limit exceeded - 429 response from API")
+
+    def failing():
+        raise RuntimeError("boom")
+
+    try:
+        ids = [ingest.submit(audit).audit_id, ingest.submit(failing).audit_id]
+        # Port 9 (discard) refuses the connection: the callback error arrives after "done"
+        ids.append(ingest.submit(audit, callback_url="http://127.0.0.1:9/").audit_id)
+        seen = set()
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            statuses = [ingest.get(audit_id) for audit_id in ids]
+            assert all(_consistent(status) for status in statuses)
+            seen |= {status.status for status in statuses}
+            if statuses[2].callback_error:
+                break
+        assert {"done", "failed"} <= seen
+        assert statuses[2].status == "done" and statuses[2].callback_error
+        assert ingest.get(ids[1]).error == "RuntimeError: boom"
+    finally:
+        sys.setswitchinterval(switch_interval)
+        ingest.close()
@@ -0,0 +1,54 @@
+"""
+Checks for live.py: a lagging subscriber's stream ends before the gap, and a reconnect
+with Last-Event-ID replays what it missed.
+
+Run: python -m pytest test_live.py
+"""
+
+import asyncio
+import re
+
+from live import LiveFeed
+from tools import AuditReport, Violation
+
+
+def _report(violations: int) -> AuditReport:
+    violation = Violation(type="COST_SPIKE", severity="CRITICAL", agent_id="Agent-1", description="d", recommendation="r")
+    return AuditReport(risk_score=50, violations=[violation] * violations, summary="s", agents_audited=["Agent-1"])
+
+
+async def _read(stream) -> list[int]:
+    """Event IDs of a stream, until it ends."""
+    ids = []
+    async for chunk in stream:
+        ids += [int(event_id) for event_id in re.findall(rb"^id: (\d+)$", chunk, re.M)]
+    return ids
+
+
+def test_lagged_stream_ends_before_the_gap_and_replay_fills_it():
+    async def run():
+        feed = LiveFeed(max_pending=4)
+        feed.start()
+        stream = feed.stream()
+        await stream.__anext__()  # subscribed
+        feed.publish(_report(500), "small")  # 2 events: queued
+        feed.publish(_report(2000), "large")  # 5 events: over max_pending, dropped
+        feed.publish(_report(0), "later")  # 1 event: must not be sent after the gap
+        while feed._queue.qsize():
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        first = await asyncio.wait_for(_read(stream), 5)
+        assert first == [1, 2]
+
+        replay = feed.stream(str(first[-1]))
+        await replay.__anext__()
+        second = []
+        async for chunk in replay:
+            second += [int(event_id) for event_id in re.findall(rb"^id: (\d+)$", chunk, re.M)]
+            if len(second) >= 6:
+                break
+        await replay.aclose()
+        feed.close()
+        assert second == [3, 4, 5, 6, 7, 8]
+
+    asyncio.run(run())
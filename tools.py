@@ -11,10 +11,27 @@ Tool boundary: accepts only string input (agent activity logs), returns structur
 audit report. Read-only; no direct agent modification.
 """
 
+import os
 import re
+import threading
+import time
 from datetime import datetime
+from functools import lru_cache
 from pydantic import BaseModel, Field
 
+from cache import PersistentCache, ResultCache, content_key
+from metrics import REGISTRY, Counter, Histogram
+
+try:
+    import ahocorasick  # pyahocorasick: C Aho-Corasick automaton for the literal prefilter
+except ImportError:
+    ahocorasick = None
+
+try:
+    import re2  # google-re2: linear-time regex matching (no catastrophic backtracking)
+except ImportError:
+    re2 = None
+
 
 class Violation(BaseModel):
     """Single violation detected in agent activity."""
@@ -26,13 +43,53 @@ class Violation(BaseModel):
     recommendation: str = Field(description="How to fix it")
 
 
+class ViolationGroup(BaseModel):
+    """Violations of one rule by one agent, aggregated over the log."""
+
+    type: str = Field(description="COST_SPIKE | SECURITY | RATE_LIMIT | ANOMALY")
+    severity: str = Field(description="CRITICAL | HIGH | MEDIUM | LOW")
+    agent_id: str = Field(description="Agent that triggered the violations")
+    rule: int = Field(description="Index of the audit rule that matched")
+    description: str = Field(description="What happened (first occurrence)")
+    recommendation: str = Field(description="How to fix it")
+    count: int = Field(description="Number of violating lines")
+    first_line: int = Field(description="Line number of the first occurrence (1-based)")
+    last_line: int = Field(description="Line number of the last occurrence")
+    min_value: int | None = Field(default=None, description="Smallest extracted count/cost, if the rule extracts one")
+    max_value: int | None = Field(default=None, description="Largest extracted count/cost, if the rule extracts one")
+
+
+class LLMUsage(BaseModel):
+    """How much of the log a hybrid audit sent to the LLM (token counts estimated at ~4 chars/token)."""
+
+    lines_total: int = Field(description="Non-blank log lines")
+    lines_sent: int = Field(description="Distinct unresolved suspicious lines sent to the LLM")
+    llm_calls: int = Field(default=0, description="LLM batches answered")
+    failed_calls: int = Field(default=0, description="LLM batches that failed (their lines are covered by rules only)")
+    estimated_full_tokens: int = Field(description="Prompt tokens a full-log AI audit would have used")
+    estimated_sent_tokens: int = Field(description="Prompt tokens the hybrid audit used")
+    tokens_saved: int = Field(description="estimated_full_tokens - estimated_sent_tokens")
+
+
 class AuditReport(BaseModel):
     """Structured audit report for AI agent governance."""
 
     risk_score: int = Field(description="Overall risk score (0-100, higher = worse)")
     violations: list[Violation] = Field(default_factory=list, description="Detected violations")
+    violation_groups: list[ViolationGroup] = Field(
+        default_factory=list, description="Aggregated violations (aggregate mode; violations is then empty)"
+    )
     summary: str = Field(description="Executive summary of audit findings")
     agents_audited: list[str] = Field(default_factory=list, description="Agent IDs included in audit")
+    oversized_lines: int = Field(default=0, description="Lines longer than the per-line limit (matched in chunks)")
+    lines_over_budget: int = Field(default=0, description="Lines whose matching stopped at the per-line time budget")
+    llm_usage: LLMUsage | None = Field(default=None, description="LLM token usage (hybrid AI audits only)")
+
+
+class BatchAuditReport(BaseModel):
+    """One audit report per independent log set, keyed by the caller's ID."""
+
+    reports: dict[str, AuditReport] = Field(default_factory=dict, description="Audit report per log set ID")
 
 
 # Audit rules: (pattern, violation_type, severity, description_template, recommendation)
@@ -177,97 +234,905 @@ _AUDIT_RULES: list[tuple[re.Pattern[str], str, str, str, str]] = [
     ),
 ]
 
+# Literals each rule needs before its regex can match, aligned with _AUDIT_RULES.
+# Every inner tuple is an any-of group (lowercase); all groups of a rule must occur in the
+# line. Keep these sound when editing a rule: a literal listed here must appear in
+# every line the rule matches, or the prefilter will hide real violations.
+_RULE_LITERALS: list[tuple[tuple[str, ...], ...]] = [
+    (("cost",), ("$",)),
+    (("gpt-4", "claude-opus", "o1"), ("call",)),
+    (("$", "dollar", "usd"),),
+    (("spend", "bill", "budget exceed", "overrun", "runaway cost"),),
+    (("unauthorized", "forbidden", "denied", "restricted"),),
+    (("database", "db", "sql", "postgres", "redis"), ("write",)),
+    (("api_key", "api-key", "apikey", "secret", "token", "password", "credential", "leak", "exposed", "breach"),),
+    (("admin", "root", "sudo", "elevated", "privilege escalation"),),
+    (("call", "request", "invocation"), ("min",)),
+    (("rate limit", "throttle", "429", "503", "quota exceeded", "too many requests"),),
+    (("excessive", "overload", "too many"), ("request", "call", "api")),
+    (("request", "call", "invocation"),),
+    (("same tool", "repeated", "loop", "duplicate"),),
+    (("consecutive",), ("error", "fail")),
+    (("error", "failed", "exception"),),
+    (("error", "fail", "timeout", "exception"),),
+    (("infinite loop", "stuck", "hang", "crash", "timeout", "repeated failure"),),
+    (("retry", "retries"),),
+    (("retry", "retries"),),
+]
+
+
+_AGENT_RE = re.compile(r"Agent-\w+")
+_DIGIT_RUN = re.compile(r"[0-9]+")
+
+
+def _template_values(desc_template: str, groups: tuple[str, ...]) -> dict[str, str]:
+    """Values for a rule's description template, picked from its captured groups."""
+    n = len(groups)
+    agent_id = groups[0] if n >= 1 else "Unknown"
+
+    # Build description with matched values (group layout varies by rule)
+    count_val = "multiple"
+    if n >= 2 and "count" in desc_template:
+        if "excessive API usage" in desc_template and n >= 4:
+            count_val = groups[1]
+        elif "consecutive errors" in desc_template or "high request" in desc_template or "retry count" in desc_template:
+            count_val = groups[1]
+        else:
+            count_val = groups[2] if n >= 3 else groups[1]
+    time_val = f"{groups[3]} min" if n >= 4 else "short period"
+    return {
+        "agent": agent_id,
+        "cost": groups[1] if n >= 2 else "unknown",
+        "model": groups[1] if "model" in desc_template else "",
+        "count": count_val,
+        "time": time_val,
+    }
+
+
+def _describe(desc_template: str, groups: tuple[str, ...]) -> tuple[str, str]:
+    """Fill a rule's description template from its captured groups; returns (agent_id, description)."""
+    values = _template_values(desc_template, groups)
+    return values["agent"], desc_template.format(**values)
+
+
+def _rule_value(desc_template: str, groups: tuple[str, ...]) -> int | None:
+    """The count or cost a rule's description reports, as a number (None if it has none)."""
+    field = "count" if "{count}" in desc_template else "cost" if "{cost}" in desc_template else None
+    if field is None:
+        return None
+    value = _template_values(desc_template, groups)[field]
+    return int(value) if value.isdecimal() else None
+
+
+# Python's \w, \d and \s are Unicode-aware; RE2's are ASCII-only. Linear mode rewrites them
+# so both backends agree (exactly on ASCII lines, up to Unicode case-folding quirks otherwise).
+_RE2_CLASSES = {"w": r"[\p{L}\p{N}_]", "d": r"\p{Nd}", "s": r"[\t-\r\x1c-\x1f\x85\p{Z}]"}
+
 
-def audit_agent_activity(activity_logs: str) -> AuditReport:
+def _re2_pattern(pattern: str) -> str:
+    """Translate a Python-syntax rule pattern to RE2 syntax."""
+    return re.sub(r"(?<!\\)\\([wds])", lambda m: _RE2_CLASSES[m.group(1)], pattern)
+
+
+def _re2_options(flags: int):
+    options = re2.Options()
+    options.case_sensitive = not flags & re.I
+    return options
+
+
+class RuleEngine:
     """
-    Audit AI agent activity logs and return structured governance report.
+    Compiled form of the audit rules: one alternation, matched once per line.
 
-    Tool contract: read-only. Accepts activity logs as string; no side effects.
-    Designed for MCP-based multi-agent governance under Archestra.
+    Every rule is (Agent-\w+) followed by a tail starting with .*, so a rule that
+    matches a line also matches at the first agent mention, and whether it matches
+    does not depend on how much of the agent name \w+ takes. The combined pattern
+    is therefore Agent-\w followed by every rule tail in priority order, matched
+    once at that position; only the winning rule is re-run to capture its groups
+    exactly as a standalone search would.
 
-    Args:
-        activity_logs: Raw activity logs from one or more AI agents
+    With literals (see _RULE_LITERALS), each line is first scanned once for all rule
+    keywords and only the rules whose keywords are all present go into the
+    alternation; lines with no candidate rules skip the regexes entirely.
 
-    Returns:
-        AuditReport with risk score, violations, and recommendations
+    Budgets: with linear=True the regexes run on RE2, which matches in time linear in
+    the line length (Python's re backtracks; some rules are cubic on long digit runs).
+    Lines longer than max_line_chars are matched in chunks of that size, each chunk
+    prefixed with the line's agent mention, and chunking stops once line_time_budget
+    seconds have been spent on the line. The budget is checked between chunks, so a line
+    can overshoot it by one chunk's matching time: microseconds with linear=True, but up
+    to hundreds of milliseconds for a pathological chunk on backtracking re.
+
+    Profile: with profile=True, every scan counts, per rule, the lines it was a candidate
+    for (evaluations), the lines it won (hits) and the time of those matching calls; time
+    of scans no rule won is counted separately. Counters are plain ints (unlocked: a
+    concurrent increment can occasionally be lost) and evaluations are kept per literal
+    prefilter result, expanded to rules only by rule_stats(). Memo hits are not scans.
+
+    Memo: with memo_size, results of lines up to memo_max_chars are remembered, so a
+    repeated line skips the scan. With mask_numbers, the winning rule is also remembered
+    per number-masked template of the line ("cost $12" and "cost $7" share one), and a
+    line with a known template only re-runs that one rule for its groups. Masking keeps
+    every distinction the rules can see: digit runs are shortened to at most as many
+    digits as a rule can consume from one run, and runs that overlap a digit literal
+    of the rules (e.g. "gpt-4", "429") are kept verbatim. The engine is shared by request
+    threads, so memo lookups, evictions and inserts hold one lock (scans do not).
     """
-    if not activity_logs or not activity_logs.strip():
-        return AuditReport(
-            risk_score=0,
-            violations=[],
-            summary="No activity logs provided for audit.",
-            agents_audited=[],
+
+    _AGENT_GROUP = r"(Agent-\w+)"
+    _NO_TEMPLATE = object()  # memo miss (None is a valid "no rule matches")
+
+    def __init__(
+        self,
+        rules: list[tuple[re.Pattern[str], str, str, str, str]],
+        literals: list[tuple[tuple[str, ...], ...]] | None = None,
+        linear: bool = False,
+        max_line_chars: int = 4096,
+        line_time_budget: float = 0.05,
+        memo_size: int = 0,
+        memo_max_chars: int = 512,
+        mask_numbers: bool = True,
+        profile: bool = False,
+    ):
+        flags = {pattern.flags for pattern, *_ in rules}
+        if len(flags) != 1:
+            raise ValueError("All audit rules must be compiled with the same flags")
+        if literals is not None and len(literals) != len(rules):
+            raise ValueError("Rule literals must be aligned with the audit rules")
+        if linear and re2 is None:
+            raise RuntimeError("Linear-time matching requires google-re2 (pip install google-re2)")
+        if max_line_chars < 256:
+            raise ValueError("max_line_chars must be at least 256")
+
+        self.rules = rules
+        self.linear = linear
+        self.max_line_chars = max_line_chars
+        self.line_time_budget = line_time_budget
+        self._flags = flags.pop()
+        self._tails = []
+        for index, (pattern, *_) in enumerate(rules):
+            tail = pattern.pattern[len(self._AGENT_GROUP):]
+            if not pattern.pattern.startswith(self._AGENT_GROUP) or not tail.startswith(".*"):
+                raise ValueError(f"Audit rule {index} must start with {self._AGENT_GROUP}.*")
+            self._tails.append(tail)
+        self._exact = [self._compile(pattern.pattern) for pattern, *_ in rules]
+        self._agent_start = re.compile(r"Agent-\w+", self._flags)
+
+        # Prefilter: every (rule, any-of group) is one bit; a literal sets the bits of the
+        # groups it satisfies, and a rule is a candidate once all of its bits are set.
+        self._literal_bits: dict[str, int] = {}
+        self._rule_bits: list[int] = []
+        bit = 0
+        for groups in literals or [()] * len(rules):
+            mask = 0
+            for group in groups:
+                for literal in group:
+                    self._literal_bits[literal] = self._literal_bits.get(literal, 0) | 1 << bit
+                mask |= 1 << bit
+                bit += 1
+            self._rule_bits.append(mask)
+        self._all_bits = (1 << bit) - 1
+        self._automaton = None
+        if ahocorasick is not None and self._literal_bits:
+            self._automaton = ahocorasick.Automaton()
+            for literal, bits in self._literal_bits.items():
+                self._automaton.add_word(literal, bits)
+            self._automaton.make_automaton()
+        self._matcher_for = lru_cache(maxsize=1024)(self._compile_matcher)
+
+        # Linear mode answers "which rules match here" with one anchored RE2::Set pass
+        # (DFA only, no captures); only the winning rule then runs with captures.
+        self._rule_set = None
+        if linear:
+            self._rule_set = re2.Set.MatchSet(_re2_options(self._flags))
+            for pattern, *_ in rules:
+                self._rule_set.Add(_re2_pattern(pattern.pattern))
+            self._rule_set.Compile()
+
+        self.memo_size = memo_size
+        self.memo_max_chars = min(memo_max_chars, max_line_chars)  # memoized lines are never chunked
+        self.memo_hits = 0
+        self.template_hits = 0
+        self.memo_misses = 0
+        self._memo: dict[str, tuple] = {}  # line -> (agent, hit, True)
+        self._templates: dict[str, int | None] = {}  # masked line -> winning rule index or None
+        self._memo_lock = threading.Lock()
+        self._masking = self._number_masking(literals) if memo_size and mask_numbers else None
+
+        self.profile = profile
+        self.rule_hits = [0] * len(rules)
+        self.rule_seconds = [0.0] * len(rules)
+        self.unmatched_seconds = 0.0
+        self._scans: dict[int, int] = {}  # literal prefilter bits -> lines matched with them
+
+    def _number_masking(self, literals) -> tuple[list[str], list[str]] | None:
+        """
+        (digit literals, replacement per digit-run length) for number masking, or None if
+        the rules use digits in a way masking could not preserve.
+        """
+        if not literals:
+            return None  # no literal list: digit literals in the patterns are unknown
+        digit_literals = sorted({lit for groups in literals for group in groups for lit in group if re.search(r"[0-9]", lit)})
+        cap = 1
+        pattern_digits = set()
+        for pattern, *_ in self.rules:
+            if re.search(r"\\d\{\d*,?\d+\}", pattern.pattern):
+                return None  # \d{n} / \d{n,m}: the exact run length matters
+            # Digits one match can take from a single run: all \d tokens plus the agent \w
+            needed = 1 + sum(
+                int(n) if n else (0 if op in "*?" else 1)
+                for n, op in re.findall(r"\\d(?:\{(\d+),\}|([+*?]?))", pattern.pattern)
+            )
+            cap = max(cap, needed)
+            pattern_digits |= set(re.findall(r"[0-9]", re.sub(r"\{[0-9,]*\}", "", pattern.pattern)))
+        if not pattern_digits <= set("".join(digit_literals)):
+            return None  # a digit in a pattern that no literal accounts for
+        unused = sorted(set("0123456789") - pattern_digits)
+        if not unused:
+            return None
+        return digit_literals, [unused[0] * min(n, cap) for n in range(cap + 1)]
+
+    def _template(self, line: str) -> str | None:
+        """Number-masked form of an ASCII line (None if it is not ASCII or has no digits)."""
+        if not line.isascii():
+            return None
+        digit_literals, masks = self._masking
+        lowered = line.lower()
+        keep = [
+            (m.start(), m.start() + len(literal))
+            for literal in digit_literals if literal in lowered
+            for m in re.finditer(re.escape(literal), lowered)
+        ]
+        cap = len(masks) - 1
+
+        def mask(run: re.Match) -> str:
+            start, end = run.span()
+            if any(s < end and start < e for s, e in keep):
+                return run.group(0)
+            return masks[min(end - start, cap)]
+
+        template, n = _DIGIT_RUN.subn(mask, line)
+        return template if n else None
+
+    def _remember(self, memo: dict, key: str, value):
+        with self._memo_lock:
+            if key not in memo and len(memo) >= self.memo_size:
+                memo.pop(next(iter(memo)), None)  # oldest entry (FIFO: no reordering on hits)
+            memo[key] = value
+
+    def memo_stats(self) -> dict:
+        """Line memo counters and sizes."""
+        lookups = self.memo_hits + self.template_hits + self.memo_misses
+        return {
+            "max_entries": self.memo_size,
+            "lines": len(self._memo),
+            "templates": len(self._templates),
+            "hits": self.memo_hits,
+            "template_hits": self.template_hits,
+            "misses": self.memo_misses,
+            "hit_rate": round((self.memo_hits + self.template_hits) / lookups, 4) if lookups else 0.0,
+        }
+
+    def _compile(self, pattern: str):
+        if self.linear:
+            return re2.compile(_re2_pattern(pattern), _re2_options(self._flags))
+        return re.compile(pattern, self._flags)
+
+    def _compile_matcher(self, hits: int) -> tuple[re.Pattern[str] | None, dict[int, int]] | None:
+        """Combined pattern over the candidate rules for a set of literal hits (None if no candidates)."""
+        # Each tail ends in an empty marker group; the marker that participated in the
+        # match maps back to the rule.
+        markers: dict[int, int] = {}
+        parts = []
+        group = 0
+        for index, (pattern, *_) in enumerate(self.rules):
+            if self._rule_bits[index] & hits != self._rule_bits[index]:
+                continue
+            parts.append(f"{self._tails[index]}()")
+            group += pattern.groups  # tail groups (all but the agent) + marker
+            markers[group] = index
+        if not parts:
+            return None
+        if self.linear:
+            return None, markers  # candidates only; matching goes through the rule set
+        return re.compile(r"Agent-\w(?:" + "|".join(parts) + ")", self._flags), markers
+
+    def _scan_literals(self, line: str) -> int:
+        """Bits of every rule literal group present in the line (one pass over the line)."""
+        if not line.isascii():
+            # str.lower() and re.IGNORECASE disagree on some non-ASCII letters; skip the prefilter
+            return self._all_bits
+        lowered = line.lower()
+        hits = 0
+        if self._automaton is not None:
+            for _, bits in self._automaton.iter(lowered):
+                hits |= bits
+        else:
+            for literal, bits in self._literal_bits.items():
+                if literal in lowered:
+                    hits |= bits
+        return hits
+
+    def rule_stats(self) -> list[dict]:
+        """Per rule: evaluations, hits and seconds spent in the matching calls it won (profile=True)."""
+        evaluations = [0] * len(self.rules)
+        for bits, scans in list(self._scans.items()):
+            for index in self._matcher_for(bits)[1].values():
+                evaluations[index] += scans
+        return [
+            {
+                "rule": index,
+                "type": rule[1],
+                "evaluations": evaluations[index],
+                "hits": self.rule_hits[index],
+                "seconds": self.rule_seconds[index],
+            }
+            for index, rule in enumerate(self.rules)
+        ]
+
+    def _match_rules(self, line: str, pos: int) -> tuple[int, tuple[str, ...]] | None:
+        """First rule matching at pos (an agent mention), with its groups."""
+        bits = self._scan_literals(line) if self._literal_bits else self._all_bits
+        compiled = self._matcher_for(bits)
+        if compiled is None:
+            return None
+        if not self.profile:
+            return self._run_matcher(compiled, line, pos)
+        started = time.perf_counter()
+        hit = self._run_matcher(compiled, line, pos)
+        elapsed = time.perf_counter() - started
+        self._scans[bits] = self._scans.get(bits, 0) + 1
+        if hit is None:
+            self.unmatched_seconds += elapsed
+        else:
+            self.rule_hits[hit[0]] += 1
+            self.rule_seconds[hit[0]] += elapsed
+        return hit
+
+    def _run_matcher(self, compiled: tuple, line: str, pos: int) -> tuple[int, tuple[str, ...]] | None:
+        matcher, markers = compiled
+        if self._rule_set is not None:
+            matched = self._rule_set.Match(line[pos:])
+            if not matched:
+                return None
+            index = min(matched)
+        else:
+            match = matcher.match(line, pos)
+            if match is None:
+                return None
+            groups = match.groups()
+            index = next(rule for marker, rule in markers.items() if groups[marker - 1] is not None)
+        return index, self._exact[index].match(line, pos).groups()
+
+    def match_line(self, line: str) -> tuple[str | None, tuple[int, tuple[str, ...]] | None, bool]:
+        """
+        Scan one log line.
+
+        Returns (agent seen in the line or None, (rule index, rule groups) or None,
+        False if the line time budget ran out before every chunk was matched).
+        """
+        if not self.memo_size or len(line) > self.memo_max_chars:
+            return self._scan_line(line)
+
+        with self._memo_lock:
+            result = self._memo.get(line)
+        if result is not None:
+            self.memo_hits += 1
+            return result
+
+        template = self._template(line) if self._masking else None
+        if template is not None:
+            with self._memo_lock:
+                index = self._templates.get(template, self._NO_TEMPLATE)
+            if index is not self._NO_TEMPLATE:
+                self.template_hits += 1
+                result = self._rematch(line, index)
+                self._remember(self._memo, line, result)
+                return result
+
+        self.memo_misses += 1
+        result = self._scan_line(line)
+        self._remember(self._memo, line, result)
+        if template is not None:
+            self._remember(self._templates, template, result[1][0] if result[1] else None)
+        return result
+
+    def _agent(self, start: re.Match) -> str | None:
+        agent = start.group(0)
+        if not agent.startswith("Agent-"):
+            # Case-insensitive hit (e.g. "agent-x"); agents are tracked case-sensitively
+            exact = _AGENT_RE.search(start.string)
+            agent = exact.group(0) if exact else None
+        return agent
+
+    def _rematch(self, line: str, index: int | None) -> tuple:
+        """match_line result for a line whose template is known to select rule index."""
+        start = self._agent_start.search(line)
+        if start is None:
+            return None, None, True
+        if index is None:
+            return self._agent(start), None, True
+        return self._agent(start), (index, self._exact[index].match(line, start.start()).groups()), True
+
+    def _scan_line(self, line: str) -> tuple[str | None, tuple[int, tuple[str, ...]] | None, bool]:
+        start = self._agent_start.search(line)
+        if start is None:
+            return None, None, True
+
+        agent = self._agent(start)
+        pos = start.start()
+        if len(line) <= self.max_line_chars:
+            return agent, self._match_rules(line, pos), True
+
+        # Oversized: match chunk by chunk; later chunks carry the agent mention so rules can anchor
+        deadline = time.perf_counter() + self.line_time_budget
+        hit = self._match_rules(line[pos:pos + self.max_line_chars], 0)
+        prefix = start.group(0)[:128] + " "
+        step = self.max_line_chars - len(prefix)
+        for offset in range(pos + self.max_line_chars, len(line), step):
+            if hit:
+                break
+            if time.perf_counter() > deadline:
+                return agent, None, False
+            hit = self._match_rules(prefix + line[offset:offset + step], 0)
+        return agent, hit, True
+
+    def violation(self, index: int, groups: tuple[str, ...]) -> Violation:
+        """Build the Violation for a rule hit returned by match_line."""
+        _, violation_type, severity, desc_template, recommendation = self.rules[index]
+        agent_id, description = _describe(desc_template, groups)
+        return Violation(
+            type=violation_type,
+            severity=severity,
+            agent_id=agent_id,
+            description=description,
+            recommendation=recommendation,
         )
 
-    lines = [line.strip() for line in activity_logs.strip().splitlines() if line.strip()]
-    violations: list[Violation] = []
-    agents_seen: set[str] = set()
-
-    for line in lines:
-        # Extract agent ID from line
-        agent_match = re.search(r"Agent-\w+", line)
-        if agent_match:
-            agents_seen.add(agent_match.group(0))
-
-        # Check each audit rule
-        for pattern, violation_type, severity, desc_template, recommendation in _AUDIT_RULES:
-            match = pattern.search(line)
-            if match:
-                # Extract dynamic values from match
-                agent_id = match.group(1) if match.lastindex >= 1 else "Unknown"
-                
-                # Build description with matched values (group layout varies by rule)
-                count_val = "multiple"
-                if match.lastindex >= 2 and "count" in desc_template:
-                    if "excessive API usage" in desc_template and match.lastindex >= 4:
-                        count_val = match.group(2)
-                    elif "consecutive errors" in desc_template or "high request" in desc_template or "retry count" in desc_template:
-                        count_val = match.group(2)
-                    else:
-                        count_val = match.group(3) if match.lastindex >= 3 else match.group(2)
-                time_val = f"{match.group(4)} min" if match.lastindex >= 4 else "short period"
-                description = desc_template.format(
-                    agent=agent_id,
-                    cost=match.group(2) if match.lastindex >= 2 else "unknown",
-                    model=match.group(2) if "model" in desc_template else "",
-                    count=count_val,
-                    time=time_val,
-                )
-
-                violations.append(
-                    Violation(
-                        type=violation_type,
-                        severity=severity,
-                        agent_id=agent_id,
-                        description=description,
-                        recommendation=recommendation,
-                    )
-                )
-                break  # One violation per line
 
+# Built once at import; shared by every audit. Env overrides:
+#   SENTINEL_LINEAR_REGEX    auto (RE2 when installed) | 1 | 0
+#   SENTINEL_MAX_LINE_CHARS  chunk size for oversized lines (default 4096 with RE2, 256 with backtracking re)
+#   SENTINEL_LINE_BUDGET_MS  time budget per oversized line (default 50; checked between chunks,
+#                            so a hard bound only with RE2)
+#   SENTINEL_LINE_MEMO       lines (and number-masked templates) remembered, default 16384; 0 = off
+#   SENTINEL_LINE_MEMO_MAX_CHARS  longest line memoized (default 512)
+#   SENTINEL_MASK_NUMBERS    1 (default) | 0: share rule decisions between lines differing only in numbers
+#   SENTINEL_RULE_PROFILE    1 (default) | 0: per-rule evaluation/hit/time counters for /metrics
+_linear_env = os.environ.get("SENTINEL_LINEAR_REGEX", "auto").strip().lower()
+_LINEAR = re2 is not None if _linear_env == "auto" else _linear_env in ("1", "true", "yes")
+_ENGINE = RuleEngine(
+    _AUDIT_RULES,
+    _RULE_LITERALS,
+    linear=_LINEAR,
+    max_line_chars=int(os.environ.get("SENTINEL_MAX_LINE_CHARS", "4096" if _LINEAR else "256")),
+    line_time_budget=float(os.environ.get("SENTINEL_LINE_BUDGET_MS", "50")) / 1000,
+    memo_size=int(os.environ.get("SENTINEL_LINE_MEMO", "16384")),
+    memo_max_chars=int(os.environ.get("SENTINEL_LINE_MEMO_MAX_CHARS", "512")),
+    mask_numbers=os.environ.get("SENTINEL_MASK_NUMBERS", "1").strip().lower() in ("1", "true", "yes"),
+    profile=os.environ.get("SENTINEL_RULE_PROFILE", "1").strip().lower() in ("1", "true", "yes"),
+)
+
+# Identifies the rules and matching limits; part of every rule-based cache key, so
+# editing a rule never serves reports computed with the old one
+RULESET_VERSION = content_key(
+    repr([(pattern.pattern, pattern.flags, *rest) for pattern, *rest in _AUDIT_RULES]),
+    repr(_RULE_LITERALS),
+    str(_ENGINE.max_line_chars),
+).hex()[:16]
+
+# Reports of recent inputs. SENTINEL_CACHE_ENTRIES (default 1024, 0 = off),
+# SENTINEL_CACHE_MB (approximate memory bound, default 64), SENTINEL_CACHE_TTL (seconds, default 300)
+RESULT_CACHE = ResultCache(
+    max_entries=int(os.environ.get("SENTINEL_CACHE_ENTRIES", "1024")),
+    max_bytes=int(float(os.environ.get("SENTINEL_CACHE_MB", "64")) * (1 << 20)),
+    ttl=float(os.environ.get("SENTINEL_CACHE_TTL", "300")),
+)
+
+
+# ----- Metrics (served by /metrics; see metrics.py) -----
+
+# Audit requests; endpoint is the REST route or MCP tool, mode rules | ai | hybrid | events
+AUDIT_SECONDS = Histogram(
+    "sentinel_audit_seconds", "Audit request latency, from parsed request to encoded report", ("endpoint", "mode")
+)
+AUDIT_LINES = Counter("sentinel_audit_lines_total", "Log lines (or event records) audited", ("endpoint", "mode"))
+AUDIT_BYTES = Counter(
+    "sentinel_audit_input_bytes_total",
+    "Audit input size (request body bytes; log text size when not known)",
+    ("endpoint", "mode"),
+)
+
+
+def observe_audit(endpoint: str, mode: str, seconds: float, lines: int, size: int):
+    """One completed audit request: latency, lines and input size (lines/sec is rate() of the lines)."""
+    labels = (endpoint, mode)
+    AUDIT_SECONDS.observe(seconds, labels)
+    AUDIT_LINES.inc(lines, labels)
+    AUDIT_BYTES.inc(size, labels)
+
+
+def count_lines(logs: str) -> int:
+    """Lines in a log text as splitlines() would see them (newline-terminated or not)."""
+    if not logs:
+        return 0
+    return logs.count("\n") + (not logs.endswith("\n"))
+
+
+VIOLATIONS = Counter(
+    "sentinel_violations_total", "Violations in completed audits (group counts included)", ("type", "severity")
+)
+
+
+def count_violations(report: "AuditReport | BatchAuditReport"):
+    """Add a completed audit's violations to VIOLATIONS (one counter update per type and severity)."""
+    counts: dict[tuple[str, str], int] = {}
+    reports = getattr(report, "reports", None)
+    for item in reports.values() if reports is not None else (report,):
+        for violation in item.violations:
+            key = (violation.type, violation.severity)
+            counts[key] = counts.get(key, 0) + 1
+        for group in item.violation_groups:
+            key = (group.type, group.severity)
+            counts[key] = counts.get(key, 0) + group.count
+    for key, count in counts.items():
+        VIOLATIONS.inc(count, key)
+
+
+def _engine_metrics():
+    """Rule engine, line memo and result cache counters, read at scrape time."""
+    if _ENGINE.profile:
+        stats = _ENGINE.rule_stats()
+        for name, field, help_text in (
+            ("sentinel_rule_evaluations_total", "evaluations", "Scanned lines the rule was a candidate for"),
+            ("sentinel_rule_hits_total", "hits", "Scanned lines the rule matched (memo hits excluded)"),
+            ("sentinel_rule_match_seconds_total", "seconds", "Time of the matching calls the rule won"),
+        ):
+            samples = [({"rule": str(rule["rule"]), "type": rule["type"]}, rule[field]) for rule in stats]
+            yield name, "counter", help_text, samples
+        yield "sentinel_rule_unmatched_seconds_total", "counter", "Time of the matching calls no rule won", [
+            ({}, _ENGINE.unmatched_seconds)
+        ]
+    memo = _ENGINE.memo_stats()
+    yield "sentinel_line_memo_lookups_total", "counter", "Line memo lookups by result", [
+        ({"result": "hit"}, memo["hits"]),
+        ({"result": "template"}, memo["template_hits"]),
+        ({"result": "miss"}, memo["misses"]),
+    ]
+    cache = RESULT_CACHE.stats()
+    yield "sentinel_result_cache_requests_total", "counter", "Result cache lookups by result", [
+        ({"result": "hit"}, cache["hits"]),
+        ({"result": "miss"}, cache["misses"]),
+    ]
+    yield "sentinel_result_cache_entries", "gauge", "Reports in the result cache", [({}, cache["entries"])]
+
+
+REGISTRY.add_collector(_engine_metrics)
+
+# LLM calls; path is "sync" (audit_agent_activity_ai) or "async" (llm.LLMPool)
+LLM_SECONDS = Histogram("sentinel_llm_call_seconds", "LLM call latency, failed calls included", ("path",))
+LLM_TOKENS = Counter("sentinel_llm_tokens_total", "LLM tokens used, by kind (prompt, completion)", ("path", "kind"))
+LLM_FALLBACKS = Counter(
+    "sentinel_llm_fallbacks_total",
+    "Chunks audited by the rules because the LLM was busy, timed out, failed or replied invalidly",
+    ("path", "reason"),
+)
+
+
+_SEVERITY_WEIGHTS = {"CRITICAL": 35, "HIGH": 25, "MEDIUM": 15}
+
+# Characters str.splitlines() breaks on
+_LINE_BREAKS = "\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
+
+
+def _score(count: int, severity_counts: dict[str, int], agents: int) -> tuple[int, str]:
+    """Risk score and summary for count violations (by severity) across agents."""
     # Calculate risk score
-    risk_score = min(100, len(violations) * 15 + sum(
-        35 if v.severity == "CRITICAL" else 25 if v.severity == "HIGH" else 15 if v.severity == "MEDIUM" else 5
-        for v in violations
+    risk_score = min(100, count * 15 + sum(
+        _SEVERITY_WEIGHTS.get(severity, 5) * n for severity, n in severity_counts.items()
     ))
 
     # Generate summary
-    if not violations:
-        summary = f"✅ No violations detected. Audited {len(agents_seen)} agent(s). System healthy."
+    if not count:
+        summary = f"✅ No violations detected. Audited {agents} agent(s). System healthy."
     else:
-        critical = sum(1 for v in violations if v.severity == "CRITICAL")
-        high = sum(1 for v in violations if v.severity == "HIGH")
+        critical = severity_counts.get("CRITICAL", 0)
+        high = severity_counts.get("HIGH", 0)
         summary = (
-            f"⚠️ {len(violations)} violation(s) detected across {len(agents_seen)} agent(s). "
+            f"⚠️ {count} violation(s) detected across {agents} agent(s). "
             f"{critical} CRITICAL, {high} HIGH. Immediate action required."
         )
+    return risk_score, summary
 
-    return AuditReport(
-        risk_score=risk_score,
-        violations=violations,
-        summary=summary,
-        agents_audited=sorted(list(agents_seen)),
-    )
+
+class AuditAccumulator:
+    """
+    Incremental audit state: feed log lines one at a time, read the report at any point.
+
+    Keeps only counters, the agents seen and (with keep_violations) the violations, so
+    memory does not grow with the amount of log text fed through it.
+
+    With aggregate, hits are folded into one group per (agent, type, rule) as they are
+    matched and no per-line Violation is built; the report lists violation_groups.
+    """
+
+    def __init__(self, engine: RuleEngine | None = None, keep_violations: bool = True, aggregate: bool = False):
+        self.engine = engine or _ENGINE
+        self.keep_violations = keep_violations
+        self.aggregate = aggregate
+        self.lines = 0  # physical lines fed, blank ones included (line numbers are 1-based)
+        self.violations: list[Violation] = []
+        # (agent_id, type, rule) -> [count, first_line, last_line, min_value, max_value, description]
+        self.groups: dict[tuple[str, str, int], list] = {}
+        self.agents_seen: set[str] = set()
+        self.oversized_lines = 0
+        self.lines_over_budget = 0
+        self._audited = 0
+        self._violation_count = 0
+        self._severity_counts: dict[str, int] = {}
+
+    @property
+    def audited_lines(self) -> int:
+        """Non-blank lines audited so far."""
+        return self._audited
+
+    @property
+    def violation_count(self) -> int:
+        """Violating lines so far (kept, aggregated or not)."""
+        return self._violation_count
+
+    def feed(self, line: str) -> Violation | None:
+        """Audit one physical log line; returns its violation, if any (always None when aggregating)."""
+        self.lines += 1
+        line = line.strip()
+        if not line:
+            return None
+
+        # One scan per line: agent mention plus first matching rule (one violation per line)
+        agent, hit, complete = self.engine.match_line(line)
+        if len(line) > self.engine.max_line_chars:
+            self.oversized_lines += 1
+        if not complete:
+            self.lines_over_budget += 1
+        return self._record(agent, hit)
+
+    def feed_match(self, agent: str | None, hit: tuple[int, tuple[str, ...]] | None) -> Violation | None:
+        """
+        Count one record matched outside the line scan (e.g. a structured event) as an
+        audited line; agent and hit are shaped like match_line's results.
+        """
+        self.lines += 1
+        return self._record(agent, hit)
+
+    def _record(self, agent: str | None, hit: tuple[int, tuple[str, ...]] | None) -> Violation | None:
+        self._audited += 1
+        if agent:
+            self.agents_seen.add(agent)
+        if not hit:
+            return None
+
+        self._violation_count += 1
+        if self.aggregate:
+            self._add_to_group(*hit)
+            return None
+
+        violation = self.engine.violation(*hit)
+        self._severity_counts[violation.severity] = self._severity_counts.get(violation.severity, 0) + 1
+        if self.keep_violations:
+            self.violations.append(violation)
+        return violation
+
+    def _add_to_group(self, index: int, groups: tuple[str, ...]):
+        _, violation_type, severity, desc_template, _ = self.engine.rules[index]
+        self._severity_counts[severity] = self._severity_counts.get(severity, 0) + 1
+        value = _rule_value(desc_template, groups)
+        group = self.groups.get((groups[0], violation_type, index))
+        if group is None:
+            description = _describe(desc_template, groups)[1]
+            self.groups[(groups[0], violation_type, index)] = [1, self.lines, self.lines, value, value, description]
+            return
+        group[0] += 1
+        group[2] = self.lines
+        if value is not None:
+            group[3] = value if group[3] is None else min(group[3], value)
+            group[4] = value if group[4] is None else max(group[4], value)
+
+    def merge(self, other: "AuditAccumulator"):
+        """Fold in the audit of the lines that directly follow the ones fed here."""
+        for key, (count, first, last, low, high, description) in other.groups.items():
+            group = self.groups.get(key)
+            if group is None:
+                self.groups[key] = [count, first + self.lines, last + self.lines, low, high, description]
+                continue
+            group[0] += count
+            group[2] = last + self.lines
+            if low is not None:
+                group[3] = low if group[3] is None else min(group[3], low)
+                group[4] = high if group[4] is None else max(group[4], high)
+        self.lines += other.lines
+        self.violations.extend(other.violations)
+        self.agents_seen |= other.agents_seen
+        self.oversized_lines += other.oversized_lines
+        self.lines_over_budget += other.lines_over_budget
+        self._audited += other._audited
+        self._violation_count += other._violation_count
+        for severity, n in other._severity_counts.items():
+            self._severity_counts[severity] = self._severity_counts.get(severity, 0) + n
+
+    def __getstate__(self):
+        # Sent between processes: drop the engine (rebuilt from _ENGINE) and ship violations
+        # as plain tuples, which pickle far faster than pydantic models
+        state = self.__dict__.copy()
+        del state["engine"]
+        state["violations"] = [
+            (v.type, v.severity, v.agent_id, v.description, v.recommendation) for v in self.violations
+        ]
+        return state
+
+    def __setstate__(self, state):
+        state["violations"] = [
+            Violation(type=t, severity=s, agent_id=a, description=d, recommendation=r)
+            for t, s, a, d, r in state["violations"]
+        ]
+        self.__dict__.update(state)
+        self.engine = _ENGINE
+
+    def add_violation(self, violation: Violation):
+        """Count a violation found outside the rule engine (e.g. by the LLM) in the report."""
+        self._violation_count += 1
+        self._severity_counts[violation.severity] = self._severity_counts.get(violation.severity, 0) + 1
+        if self.keep_violations:
+            self.violations.append(violation)
+
+    def report(self) -> AuditReport:
+        """Audit report over everything fed so far."""
+        if not self._audited:
+            return AuditReport(
+                risk_score=0,
+                violations=[],
+                summary="No activity logs provided for audit.",
+                agents_audited=[],
+            )
+
+        risk_score, summary = _score(self._violation_count, self._severity_counts, len(self.agents_seen))
+        if self.oversized_lines:
+            summary += (
+                f" {self.oversized_lines} oversized line(s) audited in chunks"
+                f" ({self.lines_over_budget} cut short by the time budget)."
+            )
+
+        violation_groups = []
+        for (agent_id, violation_type, index), (count, first, last, low, high, description) in self.groups.items():
+            _, _, severity, _, recommendation = self.engine.rules[index]
+            violation_groups.append(ViolationGroup(
+                type=violation_type,
+                severity=severity,
+                agent_id=agent_id,
+                rule=index,
+                description=description,
+                recommendation=recommendation,
+                count=count,
+                first_line=first,
+                last_line=last,
+                min_value=low,
+                max_value=high,
+            ))
+
+        return AuditReport(
+            risk_score=risk_score,
+            violations=list(self.violations),
+            violation_groups=violation_groups,
+            summary=summary,
+            agents_audited=sorted(self.agents_seen),
+            oversized_lines=self.oversized_lines,
+            lines_over_budget=self.lines_over_budget,
+        )
+
+
+class LineSplitter:
+    """
+    Reassembles log lines from arbitrarily split text chunks (streaming uploads).
+
+    Splits exactly like str.splitlines(). A line still unterminated after max_pending
+    characters is emitted as-is so a body without line breaks cannot grow the buffer.
+    """
+
+    def __init__(self, max_pending: int = 1 << 20):
+        self.max_pending = max_pending
+        self._pending = ""
+
+    def feed(self, text: str) -> list[str]:
+        """Complete lines contained in text (plus what was pending from earlier chunks)."""
+        if not text:
+            return []
+        buffer = self._pending + text
+        lines = buffer.splitlines()
+        self._pending = ""
+        if buffer[-1] == "\r":
+            # May be the first half of a \r\n split across chunks; decide on the next chunk
+            self._pending = lines.pop() + "\r"
+        elif buffer[-1] not in _LINE_BREAKS:
+            self._pending = lines.pop()
+            if len(self._pending) > self.max_pending:
+                lines.append(self._pending)
+                self._pending = ""
+        return lines
+
+    def flush(self) -> list[str]:
+        """The final unterminated line, if any."""
+        lines = self._pending.splitlines()
+        self._pending = ""
+        return lines
+
+
+def _cache_key(*parts: str, activity_logs: str, raw: bool = False) -> bytes:
+    """
+    Result cache key of logs audited in the mode described by parts.
+
+    Logs are normalized the way the audit sees them (lines stripped, blank lines dropped),
+    so re-submits that differ only in whitespace share an entry. With raw, the logs are
+    keyed as sent: for reports that carry physical line numbers (violation groups).
+    """
+    if raw:
+        return content_key(*parts, activity_logs or "")
+    normalized = "\n".join(filter(None, map(str.strip, (activity_logs or "").splitlines())))
+    return content_key(*parts, normalized)
+
+
+def _rules_cache_key(activity_logs: str, aggregate: bool = False) -> bytes:
+    # Aggregate reports number lines blank ones included, so blank lines change the report
+    mode = "rules-aggregate" if aggregate else "rules"
+    return _cache_key(mode, RULESET_VERSION, activity_logs=activity_logs, raw=aggregate)
+
+
+def _cache_report(key: bytes, report: AuditReport) -> AuditReport:
+    # Memory estimate: about 1 KB per violation or group (pydantic model plus its strings)
+    items = len(report.violations) + len(report.violation_groups) + 1
+    RESULT_CACHE.put(key, report, size=1024 * items + len(report.summary))
+    return report
+
+
+def audit_agent_activity(activity_logs: str, aggregate: bool = False) -> AuditReport:
+    """
+    Audit AI agent activity logs and return structured governance report.
+
+    Tool contract: read-only. Accepts activity logs as string; no side effects.
+    Designed for MCP-based multi-agent governance under Archestra.
+
+    Args:
+        activity_logs: Raw activity logs from one or more AI agents
+        aggregate: Group violations by (agent, type, rule) instead of one per line
+
+    Returns:
+        AuditReport with risk score, violations, and recommendations
+        (repeat inputs are served from RESULT_CACHE; do not modify the report)
+    """
+    key = _rules_cache_key(activity_logs, aggregate)
+    report = RESULT_CACHE.get(key)
+    if report is not None:
+        return report
+
+    audit = AuditAccumulator(aggregate=aggregate)
+    for line in (activity_logs or "").splitlines():
+        audit.feed(line)
+    return _cache_report(key, audit.report())
+
+
+def audit_agent_activity_batch(log_sets: dict[str, str], aggregate: bool = False) -> BatchAuditReport:
+    """
+    Audit many independent log sets in one call; each gets its own AuditReport.
+
+    Tool contract: read-only. All sets share the compiled rule engine, so a batch costs
+    one call instead of one per set.
+
+    Args:
+        log_sets: Raw activity logs keyed by caller ID (e.g. one entry per agent)
+        aggregate: Group each report's violations by (agent, type, rule)
+
+    Returns:
+        BatchAuditReport with one report per ID, in input order
+    """
+    return BatchAuditReport(reports={key: audit_agent_activity(logs, aggregate) for key, logs in log_sets.items()})
 
 
 # ----- Optional AI-powered audit (LLM) -----
@@ -292,11 +1157,162 @@ Output ONLY valid JSON in this exact shape (no markdown, no extra text):
 
 Rules: Flag cost spikes ($, spending, billing), security (unauthorized access, credentials, DB writes), rate limits (429, throttle, excessive calls), anomalies (loops, errors, retries). Be precise; only report real violations. risk_score 0 if no violations."""
 
+# SENTINEL_AI_MODEL: chat model for use_ai audits (any OpenAI-compatible server via OPENAI_BASE_URL)
+_AI_MODEL = os.environ.get("SENTINEL_AI_MODEL", "gpt-4o-mini")
+
+
+def _ai_messages(activity_logs: str) -> list[dict]:
+    return [
+        {"role": "system", "content": _AUDIT_SYSTEM_PROMPT},
+        {"role": "user", "content": f"Audit these agent activity logs:\n\n{activity_logs}"},
+    ]
+
+
+# LLM chunk reports on disk, shared by restarts and by processes on the same host.
+# SENTINEL_AI_CACHE_PATH (SQLite file, default sentinel_ai_cache.db, empty = off),
+# SENTINEL_AI_CACHE_MB (size bound, default 256), SENTINEL_AI_CACHE_WARM (entries
+# loaded into RESULT_CACHE at startup, default 512)
+AI_DISK_CACHE = PersistentCache(
+    os.environ.get("SENTINEL_AI_CACHE_PATH", "sentinel_ai_cache.db").strip(),
+    max_bytes=int(float(os.environ.get("SENTINEL_AI_CACHE_MB", "256")) * (1 << 20)),
+)
+_AI_CACHE_WARM = int(os.environ.get("SENTINEL_AI_CACHE_WARM", "512"))
+
+# Changing the prompt or the model starts a fresh keyspace on disk
+_AI_KEY_PREFIX = f"{_AI_MODEL}:{content_key(_AUDIT_SYSTEM_PROMPT).hex()[:16]}:"
+
+
+def _ai_disk_key(activity_logs: str) -> str:
+    """Model, prompt hash and normalized-log hash: the persistent key of an LLM report."""
+    return _AI_KEY_PREFIX + _cache_key("ai", activity_logs=activity_logs).hex()
+
+
+def _ai_cache_key(activity_logs: str) -> bytes:
+    return content_key("ai", _ai_disk_key(activity_logs))
+
+
+def _cached_ai_chunk(disk_key: str) -> AuditReport | None:
+    """LLM report of a chunk from RESULT_CACHE, else from disk (then kept in memory too)."""
+    key = content_key("ai", disk_key)
+    report = RESULT_CACHE.get(key)
+    if report is None:
+        value = AI_DISK_CACHE.get(disk_key)
+        if value is not None:
+            try:
+                report = _cache_report(key, AuditReport.model_validate_json(value))
+            except ValueError:  # written by an incompatible version
+                report = None
+    return report
+
+
+def _cache_ai_chunk(disk_key: str, report: AuditReport) -> AuditReport:
+    AI_DISK_CACHE.put(disk_key, report.model_dump_json())
+    return _cache_report(content_key("ai", disk_key), report)
+
+
+def warm_ai_cache(limit: int = _AI_CACHE_WARM) -> int:
+    """Load the most recently used LLM reports (current model and prompt) from disk into RESULT_CACHE."""
+    loaded = 0
+    for disk_key, value in AI_DISK_CACHE.recent(_AI_KEY_PREFIX, min(limit, RESULT_CACHE.max_entries)):
+        try:
+            _cache_report(content_key("ai", disk_key), AuditReport.model_validate_json(value))
+            loaded += 1
+        except ValueError:
+            pass
+    return loaded
+
+
+def _parse_ai_report(text: str) -> AuditReport:
+    """AuditReport from the model's reply; raises ValueError/TypeError/etc. if it is not valid."""
+    import json
+
+    # Strip markdown code block if present
+    if "```json" in text:
+        text = text.split("```json")[1].split("```")[0].strip()
+    elif "```" in text:
+        text = text.split("```")[1].split("```")[0].strip()
+
+    data = json.loads(text)
+    violations = [
+        Violation(
+            type=v.get("type", "ANOMALY"),
+            severity=v.get("severity", "MEDIUM"),
+            agent_id=v.get("agent_id", "Unknown"),
+            description=v.get("description", ""),
+            recommendation=v.get("recommendation", ""),
+        )
+        for v in data.get("violations", [])
+    ]
+    return AuditReport(
+        risk_score=min(100, max(0, int(data.get("risk_score", 0)))),
+        violations=violations,
+        summary=data.get("summary", ""),
+        agents_audited=list(data.get("agents_audited", [])),
+    )
+
+
+# Map-reduce for long logs: SENTINEL_AI_CHUNK_TOKENS (log tokens per prompt, ~4 chars each,
+# default 6000), SENTINEL_AI_CHUNK_CONCURRENCY (chunks in flight per audit, default 4)
+_AI_CHUNK_TOKENS = int(os.environ.get("SENTINEL_AI_CHUNK_TOKENS", "6000"))
+_AI_CHUNK_CONCURRENCY = int(os.environ.get("SENTINEL_AI_CHUNK_CONCURRENCY", "4"))
+
+
+def _split_chunks(activity_logs: str, max_tokens: int = _AI_CHUNK_TOKENS) -> list[str]:
+    """Non-blank log lines packed into chunks of about max_tokens (a longer line is a chunk of its own)."""
+    budget = max_tokens * 4
+    chunks, chunk, size = [], [], 0
+    for line in activity_logs.splitlines():
+        if not line.strip():
+            continue
+        if chunk and size + len(line) + 1 > budget:
+            chunks.append("\n".join(chunk))
+            chunk, size = [], 0
+        chunk.append(line)
+        size += len(line) + 1
+    if chunk:
+        chunks.append("\n".join(chunk))
+    return chunks
+
+
+def _merge_reports(results: list[tuple[AuditReport, bool]]) -> AuditReport:
+    """
+    One report from the (report, from_llm) results of consecutive chunks of a log,
+    independent of timing: LLM violations deduplicated in chunk order (rule violations are
+    per line and kept as they are), agents unioned, risk score and summary recomputed.
+    """
+    if len(results) == 1:
+        return results[0][0]
+    violations, seen, severity_counts, agents = [], set(), {}, set()
+    for report, from_llm in results:
+        agents.update(report.agents_audited)
+        for violation in report.violations:
+            if from_llm:
+                key = (violation.agent_id, violation.type, violation.severity, violation.description.strip().lower())
+                if key in seen:
+                    continue
+                seen.add(key)
+            violations.append(violation)
+            severity_counts[violation.severity] = severity_counts.get(violation.severity, 0) + 1
+    risk_score, summary = _score(len(violations), severity_counts, len(agents))
+    fallbacks = sum(not from_llm for _, from_llm in results)
+    if fallbacks:
+        summary += f" {fallbacks} of {len(results)} chunk(s) audited by rules only (LLM unavailable)."
+    return AuditReport(risk_score=risk_score, violations=violations, summary=summary, agents_audited=sorted(agents))
+
+
+@lru_cache(maxsize=4)
+def _openai_client(api_key: str):
+    """Shared client per API key: keeps its HTTP connection pool (and TLS sessions) across calls."""
+    from openai import OpenAI
+
+    return OpenAI(api_key=api_key)
+
 
 def audit_agent_activity_ai(activity_logs: str, api_key: str | None = None) -> AuditReport:
     """
     Audit logs using an LLM when api_key is set; otherwise fall back to rule-based.
     Use when you want the model to interpret varied or novel phrasings.
+    Blocking; async servers should use llm.audit_agent_activity_ai_async.
     """
     if not activity_logs or not activity_logs.strip():
         return AuditReport(
@@ -306,50 +1322,83 @@ def audit_agent_activity_ai(activity_logs: str, api_key: str | None = None) -> A
             agents_audited=[],
         )
 
-    api_key = api_key or __import__("os").environ.get("OPENAI_API_KEY", "").strip()
+    api_key = api_key or os.environ.get("OPENAI_API_KEY", "").strip()
     if not api_key:
         return audit_agent_activity(activity_logs)
 
+    # Only LLM answers are cached here; a fallback is retried against the API next time
+    key = _ai_cache_key(activity_logs)
+    report = RESULT_CACHE.get(key)
+    if report is not None:
+        return report
+
+    # Long logs are audited chunk by chunk (map) and the chunk reports merged (reduce)
+    chunks = _split_chunks(activity_logs)
+    if len(chunks) == 1:
+        results = [_audit_chunk_ai(chunks[0], api_key)]
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(min(_AI_CHUNK_CONCURRENCY, len(chunks))) as pool:
+            results = list(pool.map(_audit_chunk_ai, chunks, [api_key] * len(chunks)))
+
+    report = _merge_reports(results)
+    return _cache_report(key, report) if all(from_llm for _, from_llm in results) else report
+
+
+def _audit_chunk_ai(chunk: str, api_key: str) -> tuple[AuditReport, bool]:
+    """LLM report of one chunk (True), or its rule-based report if the call failed (False)."""
+    key = _ai_disk_key(chunk)
+    report = _cached_ai_chunk(key)
+    if report is not None:
+        return report, True
+    started = time.perf_counter()
     try:
-        import json
-        try:
-            from openai import OpenAI
-        except ImportError:
-            return audit_agent_activity(activity_logs)
-
-        client = OpenAI(api_key=api_key)
-        resp = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": _AUDIT_SYSTEM_PROMPT},
-                {"role": "user", "content": f"Audit these agent activity logs:\n\n{activity_logs}"},
-            ],
+        resp = _openai_client(api_key).chat.completions.create(
+            model=_AI_MODEL,
+            messages=_ai_messages(chunk),
             temperature=0.1,
         )
-        text = resp.choices[0].message.content or ""
-
-        # Strip markdown code block if present
-        if "```json" in text:
-            text = text.split("```json")[1].split("```")[0].strip()
-        elif "```" in text:
-            text = text.split("```")[1].split("```")[0].strip()
-
-        data = json.loads(text)
-        violations = [
-            Violation(
-                type=v.get("type", "ANOMALY"),
-                severity=v.get("severity", "MEDIUM"),
-                agent_id=v.get("agent_id", "Unknown"),
-                description=v.get("description", ""),
-                recommendation=v.get("recommendation", ""),
-            )
-            for v in data.get("violations", [])
-        ]
-        return AuditReport(
-            risk_score=min(100, max(0, int(data.get("risk_score", 0)))),
-            violations=violations,
-            summary=data.get("summary", ""),
-            agents_audited=list(data.get("agents_audited", [])),
-        )
-    except Exception:
-        return audit_agent_activity(activity_logs)
+    except Exception:  # openai missing, API/network error
+        LLM_SECONDS.observe(time.perf_counter() - started, ("sync",))
+        LLM_FALLBACKS.inc(1, ("sync", "error"))
+        return audit_agent_activity(chunk), False
+    LLM_SECONDS.observe(time.perf_counter() - started, ("sync",))
+    if resp.usage:
+        LLM_TOKENS.inc(resp.usage.prompt_tokens, ("sync", "prompt"))
+        LLM_TOKENS.inc(resp.usage.completion_tokens, ("sync", "completion"))
+    try:
+        return _cache_ai_chunk(key, _parse_ai_report(resp.choices[0].message.content or "")), True
+    except Exception:  # reply not a valid audit report
+        LLM_FALLBACKS.inc(1, ("sync", "invalid"))
+        return audit_agent_activity(chunk), False
+
+
+# ----- Hybrid audit: rules first, LLM only for what they leave open -----
+
+# Lines no rule matched are worth a model's look only if they carry one of these signals
+_SUSPICIOUS_RE = re.compile(
+    r"warn|error|fail|fatal|panic|crash|denied|blocked|refused|reject|invalid|unexpected|unusual|anomal|"
+    r"suspicious|violation|leak|exfiltrat|upload|transfer|external|delete|drop|truncate|rm -rf|overwrit|"
+    r"bypass|override|disable|escalat|inject|jailbreak|ignore previous|impersonat|spoof|credential|"
+    r"cost|\$|spend|budget|quota|limit|throttl|spike|surge|slow|latency|memory|oom|cpu|kill|timeout|retr",
+    re.I,
+)
+
+
+def _hybrid_rule_pass(activity_logs: str) -> tuple[AuditAccumulator, list[tuple[str, int]]]:
+    """
+    Rule-based audit plus the unresolved suspicious lines: no rule matched them but they
+    match _SUSPICIOUS_RE. Lines differing only in numbers are deduplicated; returns
+    (audit, [(first such line, occurrences)]) in log order.
+    """
+    audit = AuditAccumulator()
+    unresolved: dict[str, list] = {}
+    for line in (activity_logs or "").splitlines():
+        if audit.feed(line) is not None:
+            continue
+        line = line.strip()
+        if line and _SUSPICIOUS_RE.search(line):
+            entry = unresolved.setdefault(_DIGIT_RUN.sub("#", line.lower()), [line, 0])
+            entry[1] += 1
+    return audit, [(line, n) for line, n in unresolved.values()]